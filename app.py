@@ -1,23 +1,123 @@
 # ===================== IMPORTS =====================
 import streamlit as st
 import pandas as pd
+import io
 import json
 import os
 
-from core.preprocessing import load_and_clean_data
-from core.time_series import monthly_sales
-from core.growth_driver import category_performance
+from core.preprocessing import CHUNK_SIZE
+from core.excel_reader import iter_excel_chunks
+from core.data_validator import REASON_COLUMN, REQUIRED_COLUMNS, missing_columns, validate_rows
+from core.cube import CUBE_DIMENSIONS, build_cube, build_daily_cube, daily_from_cube, slice_cube
+from core.edits import apply_delta, edit_delta, has_changes
+from core.time_series import GRANULARITIES, PERIOD_NAMES, daily_totals, monthly_sales, pyramid_from_daily
+from core.growth_driver import category_performance, drill_down_rankings, region_performance
 from core.decision_engine import business_decision
 from core.forecast import forecast_next_months
 from core.risk_score import calculate_risk
+from core.segment_scores import score_segments
+from core.scenarios import percent_range, scenario_grid
 from core.kpi import generate_kpis
 from core.anomaly_detection import detect_anomalies
 
-from visualization.charts import sales_trend_chart
-from visualization.forecast_chart import forecast_chart
-from visualization.anomaly_chart import anomaly_chart
-from visualization.pie_chart import revenue_pie_chart
+from visualization.render import render_chart, submit_chart
 from insights.executive_summary import generate_summary
+from core.cache import make_key, memoize
+from insights.excel_report import report_sheets, submit_excel_report
+from core.profiling import PROFILE_OUT_ENV, StageProfiler, profiling_requested
+
+
+# ===================== CACHED STAGES =====================
+# Each stage is memoized on a content hash of its inputs, so a rerun with
+# unchanged data (sidebar clicks, radio toggles, buttons) skips the work
+monthly_sales = memoize(maxsize=16)(monthly_sales)
+category_performance = memoize(maxsize=16)(category_performance)
+region_performance = memoize(maxsize=16)(region_performance)
+forecast_next_months = memoize(maxsize=16)(forecast_next_months)
+calculate_risk = memoize(maxsize=16)(calculate_risk)
+score_segments = memoize(maxsize=16)(score_segments)
+detect_anomalies = memoize(maxsize=16)(detect_anomalies)
+drill_down_rankings = memoize(maxsize=16)(drill_down_rankings)
+
+
+@memoize(maxsize=4)
+def read_upload(file_name, data):
+    buffer = io.BytesIO(data)
+
+    if file_name.endswith((".csv", ".txt")):
+        return pd.read_csv(buffer)
+
+    # Streamed in read-only mode, every sheet with the required columns
+    return pd.concat(iter_excel_chunks(buffer, CHUNK_SIZE))
+
+
+# Every rule is checked in one vectorized pass; bad rows are set aside with
+# a reason code instead of rejecting the whole file
+validate_rows = memoize(maxsize=8)(validate_rows)
+
+
+@memoize(maxsize=4)
+def upload_cube(df):
+    # Aggregated once per upload; sidebar filters slice this instead of the
+    # raw rows, so filter latency depends on the number of groups
+    return build_cube(df.assign(revenue=df["price"] * df["quantity"]))
+
+
+@memoize(maxsize=16)
+def filter_rows(df, categories, regions):
+    return df.loc[
+        df["category"].isin(categories) &
+        df["region"].isin(regions),
+        REQUIRED_COLUMNS
+    ]
+
+
+build_cube = memoize(maxsize=16)(build_cube)
+
+
+@memoize(maxsize=4)
+def upload_daily_cube(df):
+    # Day x category x region totals, once per upload; the daily trend of a
+    # filter selection is a slice of this, like the monthly cube
+    return build_daily_cube(df.assign(revenue=df["price"] * df["quantity"]))
+
+
+@memoize(maxsize=16)
+def daily_view(daily_cube):
+    # Daily totals of the unedited rows, once per filter selection; edits
+    # are applied to them as deltas
+    return daily_from_cube(daily_cube)
+
+
+@memoize(maxsize=16)
+def edited_views(cube, daily, removed, added):
+    # Subtracts the edited/deleted rows and adds their replacements, so an
+    # edit costs work proportional to the touched rows and the aggregates,
+    # not to the table
+    return (
+        apply_delta(cube, build_cube(removed), build_cube(added), CUBE_DIMENSIONS),
+        apply_delta(daily, daily_totals(removed), daily_totals(added), ["date"])
+    )
+
+
+# Steps per what-if range; the grid holds SCENARIO_STEPS ** 2 scenarios
+SCENARIO_STEPS = 21
+
+
+@memoize(maxsize=16)
+def what_if(df, categories, regions, price_range, quantity_range):
+    return scenario_grid(
+        df,
+        percent_range(*price_range, SCENARIO_STEPS),
+        percent_range(*quantity_range, SCENARIO_STEPS),
+        categories=categories or None,
+        regions=regions or None
+    )
+
+
+# Built once per daily table; the granularity selector then only picks a
+# level out of the returned dict
+pyramid_from_daily = memoize(maxsize=16)(pyramid_from_daily)
 
 
 # ===================== PAGE CONFIG (FIRST STREAMLIT CALL) =====================
@@ -66,90 +166,170 @@ uploaded_file = st.file_uploader(
 )
 
 if uploaded_file:
+    # Per-stage timings are collected when SALES_ENGINE_PROFILE=1 is set
+    profiler = StageProfiler(
+        enabled=profiling_requested(),
+        profile_path=os.environ.get(PROFILE_OUT_ENV)
+    ).start()
+
     # ---------- Read file ----------
-    if uploaded_file.name.endswith((".csv", ".txt")):
-        base_df = pd.read_csv(uploaded_file)
-    else:
-        base_df = pd.read_excel(uploaded_file)
+    # Workbooks are checked for the required columns while they are read:
+    # no sheet holding them raises ValueError
+    with profiler.stage("load"):
+        try:
+            base_df = read_upload(uploaded_file.name, uploaded_file.getvalue())
+        except ValueError:
+            base_df = None
 
     # ---------- Validation ----------
-    required_cols = {"date", "product", "category", "region", "price", "quantity"}
-    if not required_cols.issubset(base_df.columns):
+    if base_df is None or missing_columns(base_df):
         st.error("❌ Invalid file format. Required columns: date, product, category, region, price, quantity")
         st.stop()
 
+    with profiler.stage("load"):
+        base_df, rejected_df = validate_rows(base_df)
+
+    if base_df.empty:
+        st.error("❌ No valid rows found in the uploaded file")
+        st.stop()
+
     st.success("File uploaded successfully")
 
+    if not rejected_df.empty:
+        st.warning(f"⚠️ {len(rejected_df):,} rows failed validation and were left out of the analysis")
+
+        with st.expander("🚫 Rejected Rows"):
+            st.dataframe(rejected_df[REASON_COLUMN].value_counts())
+            st.download_button(
+                "⬇️ Download Rejected Rows (CSV)",
+                rejected_df.to_csv(index_label="row"),
+                file_name="rejected_rows.csv",
+                mime="text/csv"
+            )
+
+    with profiler.stage("load"):
+        cube = upload_cube(base_df)
+        daily_cube = upload_daily_cube(base_df)
+
     # ===================== SIDEBAR FILTERS =====================
     st.sidebar.header("🔍 Filters")
 
     selected_category = st.sidebar.multiselect(
         "Category",
-        options=base_df["category"].unique(),
-        default=list(base_df["category"].unique())
+        options=cube["category"].unique(),
+        default=list(cube["category"].unique())
     )
 
     selected_region = st.sidebar.multiselect(
         "Region",
-        options=base_df["region"].unique(),
-        default=list(base_df["region"].unique())
+        options=cube["region"].unique(),
+        default=list(cube["region"].unique())
     )
 
-    df = base_df[
-        base_df["category"].isin(selected_category) &
-        base_df["region"].isin(selected_region)
-    ]
+    granularity = st.sidebar.selectbox(
+        "Granularity",
+        options=list(GRANULARITIES),
+        index=list(GRANULARITIES).index("monthly"),
+        format_func=str.title
+    )
+    period = PERIOD_NAMES[granularity]
+
+    # Filters only ever slice the cube; the raw rows are sliced only while
+    # the editor is open, as it is the one place that shows them
+    cube_view = slice_cube(cube, selected_category, selected_region)
 
-    if df.empty:
+    if cube_view.empty:
         st.warning("⚠️ No data available for selected filters.")
         st.stop()
 
     # ===================== EDITABLE TABLE =====================
     st.markdown("## 📝 Edit Data (Optional)")
-    st.caption("Edit values below and click **Save Changes** to apply updates.")
+    editing = st.toggle("Edit rows", key="edit_rows")
+    has_edits = False
 
-    edited_df = st.data_editor(
-        df,
-        num_rows="dynamic",
-        use_container_width=True
-    )
+    if editing:
+        st.caption("Edit values below and click **Save Changes** to apply updates.")
 
-    save_changes = st.button("💾 Save Changes")
+        rows = filter_rows(base_df, selected_category, selected_region)
 
-    # ---------- APPLY EDITED DATA ----------
-    if save_changes:
-        df = edited_df.copy()
-        st.success("✅ Changes saved and applied")
-    else:
-        df = edited_df.copy()
+        st.data_editor(
+            rows,
+            num_rows="dynamic",
+            use_container_width=True,
+            key="sales_editor"
+        )
+
+        # The editor's change log (edited/added/deleted row positions) is read
+        # instead of diffing the whole edited table
+        editor_state = st.session_state.get("sales_editor", {})
+        has_edits = has_changes(editor_state)
+
+        # ---------- APPLY EDITED DATA ----------
+        if st.button("💾 Save Changes"):
+            st.success("✅ Changes saved and applied")
 
     # ---------- Safety validation after edit ----------
-    if (df["price"] <= 0).any() or (df["quantity"] <= 0).any():
-        st.error("❌ Price and Quantity must be positive values")
-        st.stop()
+    if has_edits:
+        removed_rows, added_rows, rejected_edits = edit_delta(rows, editor_state)
+
+        if not rejected_edits.empty:
+            st.warning(
+                f"⚠️ {len(rejected_edits):,} edited rows are invalid "
+                f"({', '.join(rejected_edits[REASON_COLUMN].unique())}) and were ignored"
+            )
 
     # ===================== ENGINE PIPELINE =====================
-    os.makedirs("data", exist_ok=True)
-    df.to_csv("data/temp_sales.csv", index=False)
-
-    df = load_and_clean_data("data/temp_sales.csv")
-    monthly = monthly_sales(df)
-    category_df = category_performance(df)
-
-    decision = business_decision(monthly)
-    forecast = forecast_next_months(monthly)
-    risk = calculate_risk(monthly, forecast)
-    anomalies = detect_anomalies(monthly)
-
-    summary = generate_summary(
-        decision,
-        category_df.iloc[0]["category"],
-        risk,
-        forecast
-    )
+    # Everything below works off the pre-aggregated cube and daily totals;
+    # edits are folded into both as deltas of the touched rows
+    with profiler.stage("analysis"):
+        daily = daily_view(slice_cube(daily_cube, selected_category, selected_region))
+
+        if has_edits:
+            df, daily = edited_views(cube_view, daily, removed_rows, added_rows)
+
+            if df.empty:
+                st.warning("⚠️ No valid rows left after editing.")
+                st.stop()
+        else:
+            df = cube_view
+
+        monthly = monthly_sales(df)
+
+        # Top/bottom k at every hierarchy level in one grouped pass; the top
+        # category is the first entry, so nothing is fully sorted
+        rankings = drill_down_rankings(df)
+
+        # Trend, KPI cards and anomaly chart follow the selected granularity;
+        # decision, forecast and risk stay monthly
+        trend = pyramid_from_daily(daily)[granularity]
+
+    with profiler.stage("decision"):
+        decision = business_decision(monthly)
+
+    with profiler.stage("forecast"):
+        forecast = forecast_next_months(monthly)
+
+    with profiler.stage("risk"):
+        risk = calculate_risk(monthly, forecast)
+        segments = score_segments(df)
+
+    with profiler.stage("anomalies"):
+        anomalies = detect_anomalies(monthly)
+
+    with profiler.stage("summary"):
+        summary = generate_summary(
+            decision,
+            rankings["category"]["top"][0]["category"],
+            risk,
+            forecast,
+            rankings
+        )
+
+        summary["kpis"] = generate_kpis(monthly)
+        summary["anomalies"] = anomalies
 
-    summary["kpis"] = generate_kpis(monthly)
-    summary["anomalies"] = anomalies
+        trend_kpis = generate_kpis(trend, granularity)
+        trend_anomalies = detect_anomalies(trend)
 
     # ===================== KPI CARDS =====================
     st.markdown("## 📌 Key Metrics")
@@ -158,30 +338,30 @@ if uploaded_file:
 
     with c1:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("Avg Monthly Revenue", f"₹{summary['kpis']['avg_monthly_revenue']}")
+        st.metric(f"Avg {granularity.title()} Revenue", f"₹{trend_kpis[f'avg_{granularity}_revenue']}")
         st.markdown('</div>', unsafe_allow_html=True)
 
     with c2:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("Best Month", summary["kpis"]["best_month"])
+        st.metric(f"Best {period.title()}", trend_kpis[f"best_{period}"])
         st.markdown('</div>', unsafe_allow_html=True)
 
     with c3:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("Worst Month", summary["kpis"]["worst_month"])
+        st.metric(f"Worst {period.title()}", trend_kpis[f"worst_{period}"])
         st.markdown('</div>', unsafe_allow_html=True)
 
     with c4:
-        if len(monthly) >= 2:
-            last = monthly.iloc[-1]["revenue"]
-            prev = monthly.iloc[-2]["revenue"]
+        if len(trend) >= 2:
+            last = trend.iloc[-1]["revenue"]
+            prev = trend.iloc[-2]["revenue"]
             mom_growth = ((last - prev) / prev) * 100
             value = f"{mom_growth:.2f}%"
         else:
             value = "N/A"
 
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("MoM Growth", value)
+        st.metric(f"{period.title()}-over-{period.title()} Growth", value)
         st.markdown('</div>', unsafe_allow_html=True)
 
     # ===================== EXECUTIVE INSIGHT =====================
@@ -204,6 +384,35 @@ if uploaded_file:
     else:
         st.error("🔴 Business Health: High Risk")
 
+    # ===================== SEGMENT RISK =====================
+    st.markdown("## 🗺️ Segment Risk Scorecard")
+    st.caption("Every category × region segment, riskiest first")
+    st.dataframe(segments, use_container_width=True, hide_index=True)
+
+    # ===================== WHAT-IF SCENARIOS =====================
+    with st.expander("🧪 What-if Scenarios"):
+        st.caption("Change prices and volumes for some segments and see every combination's outcome")
+
+        w1, w2 = st.columns(2)
+        with w1:
+            what_if_categories = st.multiselect("Categories to change (all if empty)", options=list(cube["category"].unique()))
+            price_range = st.slider("Price change (%)", -50, 50, (0, 0))
+        with w2:
+            what_if_regions = st.multiselect("Regions to change (all if empty)", options=list(cube["region"].unique()))
+            quantity_range = st.slider("Volume change (%)", -50, 50, (0, 0))
+
+        if len(monthly) >= 2:
+            scenarios = what_if(df, what_if_categories, what_if_regions, price_range, quantity_range)
+
+            st.write(scenarios["risk_level"].value_counts().to_dict())
+            st.dataframe(
+                scenarios.sort_values(["risk_score", "total_revenue"], ascending=[False, False]),
+                use_container_width=True,
+                hide_index=True
+            )
+        else:
+            st.info("What-if scenarios need at least two months of data")
+
     # ===================== SMART RECOMMENDATIONS =====================
     st.markdown("## 🤖 Smart Recommendations")
 
@@ -220,21 +429,34 @@ if uploaded_file:
     st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
     st.markdown("## 📊 Sales Analytics")
 
+    # The three charts are drawn in parallel, straight to PNG bytes in
+    # memory; a chart whose inputs have not changed is not redrawn
+    with profiler.stage("charts"):
+        trend_job = submit_chart("sales_trend", trend, granularity)
+        forecast_job = submit_chart("forecast", forecast)
+        anomaly_job = submit_chart("anomalies", trend, trend_anomalies, granularity)
+
     left, right = st.columns(2)
 
     with left:
         st.markdown("### 📈 Sales Trend")
-        sales_trend_chart(monthly)
-        st.image("output/charts/sales_trend.png", width=520)
+        with profiler.stage("charts"):
+            trend_image = trend_job.result()
+
+        st.image(trend_image, width=520)
 
     with right:
         st.markdown("### 🔮 Forecast")
-        forecast_chart(forecast)
-        st.image("output/charts/forecast.png", width=520)
+        with profiler.stage("charts"):
+            forecast_image = forecast_job.result()
+
+        st.image(forecast_image, width=520)
 
     st.markdown("### 🚨 Anomaly Detection")
-    anomaly_chart(monthly, anomalies)
-    st.image("output/charts/anomalies.png", width=520)
+    with profiler.stage("charts"):
+        anomaly_image = anomaly_job.result()
+
+    st.image(anomaly_image, width=520)
 
     # ===================== PIE CHART WITH TOGGLE =====================
     st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
@@ -247,9 +469,20 @@ if uploaded_file:
     )
 
     mode = "category" if pie_mode == "Category" else "region"
-    pie_file = revenue_pie_chart(df, mode)
+    with profiler.stage("charts"):
+        pie_image = render_chart("revenue_pie", df, mode)
+
+    st.image(pie_image, width=520)
 
-    st.image(f"output/charts/{pie_file}", width=520)
+    if profiler.enabled:
+        profiler.stop()
+        summary["timings"] = profiler.report()
+
+        with st.expander("⏱️ Stage Timings"):
+            st.dataframe(
+                pd.DataFrame.from_dict(summary["timings"]["stages"], orient="index"),
+                use_container_width=True
+            )
 
     # ===================== DOWNLOADS =====================
     st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
@@ -261,20 +494,41 @@ if uploaded_file:
         mime="application/json"
     )
 
-    if st.button("📥 Generate Excel Report"):
-        os.makedirs("output", exist_ok=True)
-        excel_path = "output/sales_report.xlsx"
-
-        with pd.ExcelWriter(excel_path) as writer:
-            monthly.to_excel(writer, sheet_name="Monthly Sales", index=False)
-            pd.DataFrame(anomalies).to_excel(writer, sheet_name="Anomalies", index=False)
+    # The workbook is built in a background worker straight into memory; the
+    # job is tied to the data it was built from, so changing filters or
+    # edits afterwards asks for a fresh report
+    report_key = make_key(monthly, anomalies, df, forecast)
 
-        with open(excel_path, "rb") as f:
-            st.download_button(
-                "⬇️ Download Excel Report",
-                f,
-                file_name="sales_report.xlsx"
-            )
+    if st.button("📥 Generate Excel Report"):
+        # The full category ranking is only sorted for the report
+        sheets = report_sheets(
+            monthly,
+            anomalies,
+            category_performance(df),
+            region_performance(df),
+            forecast
+        )
+        st.session_state["excel_report"] = (report_key, submit_excel_report(sheets))
+
+    report_job = st.session_state.get("excel_report")
+
+    if report_job is not None and report_job[0] == report_key:
+        job = report_job[1]
+
+        @st.fragment(run_every=None if job.done() else 1)
+        def excel_report_status():
+            if not job.done():
+                st.info("⏳ Building Excel report in the background...")
+            elif job.exception() is not None:
+                st.error(f"❌ Excel report failed: {job.exception()}")
+            else:
+                st.download_button(
+                    "⬇️ Download Excel Report",
+                    job.result(),
+                    file_name="sales_report.xlsx"
+                )
+
+        excel_report_status()
 
     # ===================== RAW JSON =====================
     with st.expander("📄 View Full Analysis (JSON)"):
@@ -0,0 +1,139 @@
+import argparse
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from main import run_engine
+
+BATCH_OUTPUT_DIR = "output/batch"
+
+INPUT_EXTENSIONS = (".csv", ".txt", ".xlsx", ".xlsm")
+
+
+def find_inputs(source):
+    if os.path.isdir(source):
+        paths = [
+            os.path.join(source, name)
+            for name in os.listdir(source)
+            if name.endswith(INPUT_EXTENSIONS)
+        ]
+    else:
+        paths = glob.glob(source)
+
+    return sorted(paths)
+
+
+def _output_names(paths):
+    # One output folder per input file, named after the file; repeated names
+    # (same file name in different folders) get a numeric suffix
+    names, seen = {}, {}
+
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        seen[stem] = seen.get(stem, 0) + 1
+        names[path] = stem if seen[stem] == 1 else f"{stem}_{seen[stem]}"
+
+    return names
+
+
+def _run_one(path, output_dir, chunksize=None):
+    output_path = os.path.join(output_dir, "insights.json")
+
+    try:
+        summary = run_engine(
+            data_path=path,
+            output_path=output_path,
+            chunksize=chunksize,
+            quarantine_path=os.path.join(output_dir, "rejected_rows.csv"),
+            render_charts=False
+        )
+    except Exception as error:
+        return {
+            "file": path,
+            "status": "failed",
+            "error": f"{type(error).__name__}: {error}"
+        }
+
+    return {
+        "file": path,
+        "status": "ok",
+        "output": output_path,
+        "business_health": summary["business_health"],
+        "top_category": summary["top_category"]
+    }
+
+
+def run_batch(paths, output_dir=BATCH_OUTPUT_DIR, workers=None, chunksize=None):
+    names = _output_names(paths)
+    results = []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                _run_one,
+                path,
+                os.path.join(output_dir, names[path]),
+                chunksize
+            ): path
+            for path in paths
+        }
+
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as error:
+                # The worker process itself died (e.g. killed for memory)
+                results.append({
+                    "file": futures[future],
+                    "status": "failed",
+                    "error": f"{type(error).__name__}: {error}"
+                })
+
+    results.sort(key=lambda result: result["file"])
+
+    index = {
+        "files": len(results),
+        "succeeded": sum(result["status"] == "ok" for result in results),
+        "failed": sum(result["status"] != "ok" for result in results),
+        "results": results
+    }
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "index.json"), "w") as f:
+        json.dump(index, f, indent=4)
+
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the Sales Decision Engine for many sales files in parallel"
+    )
+    parser.add_argument("source", help="directory or glob pattern of sales files")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes (default: one per CPU)"
+    )
+    parser.add_argument(
+        "--output",
+        default=BATCH_OUTPUT_DIR,
+        help="directory for per-file insights and index.json"
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="stream each input in chunks of this many rows"
+    )
+    args = parser.parse_args()
+
+    paths = find_inputs(args.source)
+    if not paths:
+        parser.error(f"no sales files found for {args.source}")
+
+    index = run_batch(paths, args.output, args.workers, args.chunksize)
+
+    print(f"✅ Batch finished: {index['succeeded']} succeeded, {index['failed']} failed")
@@ -0,0 +1,253 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import write_sales_csv
+from core.preprocessing import CHUNK_SIZE, load_and_clean_data
+from core.cube import build_cube
+from core.time_series import monthly_sales
+from core.growth_driver import category_performance, drill_down_rankings
+from core.forecast import forecast_next_months, forecast_segments
+from core.risk_score import calculate_risk
+from core.segment_scores import score_segments
+from core.parallel_agg import partitioned_totals
+from core.anomaly_detection import detect_anomalies, detect_segment_anomalies
+from core.kpi import generate_kpis
+
+DEFAULT_ROWS = [1_000, 100_000, 1_000_000]
+
+# Above this size the in-memory loader is skipped and only the chunked path
+# is measured, so large runs do not simply measure swapping
+IN_MEMORY_LIMIT = 20_000_000
+
+
+def _measure(fn, *args, repeat=1):
+    # Timed runs go without tracemalloc, which hooks every allocation and
+    # would inflate the times; peak memory comes from one extra traced run
+    best = None
+    result = None
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+
+        result = fn(*args)
+
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    # Only one result is kept alive at a time
+    del result
+
+    tracemalloc.start()
+    try:
+        result = fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return result, {
+        "seconds": round(best, 6),
+        "peak_mb": round(peak / 2**20, 3)
+    }
+
+
+@contextmanager
+def _working_directory(path):
+    # Chart functions write to output/charts relative to the working
+    # directory; keep them away from the repository's own charts
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def _chart_stages(monthly, forecast, anomalies, df):
+    import matplotlib
+    matplotlib.use("Agg")
+
+    from visualization.charts import sales_trend_chart
+    from visualization.forecast_chart import forecast_chart
+    from visualization.anomaly_chart import anomaly_chart
+    from visualization.pie_chart import revenue_pie_chart
+    from visualization.category_pie import category_pie_chart
+
+    return [
+        ("sales_trend_chart", sales_trend_chart, (monthly,)),
+        ("forecast_chart", forecast_chart, (forecast,)),
+        ("anomaly_chart", anomaly_chart, (monthly, anomalies)),
+        ("revenue_pie_chart", revenue_pie_chart, (df, "category")),
+        ("category_pie_chart", category_pie_chart, (df,))
+    ]
+
+
+def benchmark_size(rows, work_dir, repeat=1, charts=True, **data_options):
+    path = os.path.join(work_dir, f"sales_{rows}.csv")
+
+    started = time.perf_counter()
+    write_sales_csv(path, rows, **data_options)
+    generate_seconds = time.perf_counter() - started
+
+    results = []
+
+    def record(stage, fn, *args):
+        value, measurement = _measure(fn, *args, repeat=repeat)
+        results.append({"rows": rows, "stage": stage, **measurement})
+        return value
+
+    cube = record(
+        "load_and_clean_data[chunked]+build_cube",
+        lambda: build_cube(load_and_clean_data(path, CHUNK_SIZE))
+    )
+
+    if rows <= IN_MEMORY_LIMIT:
+        df = record("load_and_clean_data", load_and_clean_data, path)
+    else:
+        df = cube
+
+    monthly = record("monthly_sales", monthly_sales, df)
+    record("category_performance", category_performance, df)
+    record("partitioned_totals[monthly+product]", partitioned_totals, df, ["monthly", "product"])
+    record("drill_down_rankings", drill_down_rankings, df)
+    forecast = record("forecast_next_months", forecast_next_months, monthly)
+    record("forecast_segments", forecast_segments, df)
+    record("calculate_risk", calculate_risk, monthly, forecast)
+    record("score_segments", score_segments, df)
+    anomalies = record("detect_anomalies", detect_anomalies, monthly)
+    record("detect_segment_anomalies", detect_segment_anomalies, df)
+    record("generate_kpis", generate_kpis, monthly)
+
+    if charts:
+        with _working_directory(work_dir):
+            for stage, fn, args in _chart_stages(monthly, forecast, anomalies, df):
+                record(stage, fn, *args)
+
+    file_mb = os.path.getsize(path) / 2**20
+    os.remove(path)
+
+    return {
+        "rows": rows,
+        "file_mb": round(file_mb, 3),
+        "generate_seconds": round(generate_seconds, 3),
+        "stages": results
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes, repeat=1, charts=True, **data_options):
+    with tempfile.TemporaryDirectory() as work_dir:
+        runs = [
+            benchmark_size(rows, work_dir, repeat, charts, **data_options)
+            for rows in sizes
+        ]
+
+    return {
+        "revision": _git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "runs": runs
+    }
+
+
+def compare(baseline, current, tolerance=0.10):
+    previous = {
+        (stage["rows"], stage["stage"]): stage
+        for run in baseline["runs"]
+        for stage in run["stages"]
+    }
+
+    rows = []
+    for run in current["runs"]:
+        for stage in run["stages"]:
+            before = previous.get((stage["rows"], stage["stage"]))
+            if before is None or not before["seconds"]:
+                continue
+
+            ratio = stage["seconds"] / before["seconds"]
+            rows.append({
+                "rows": stage["rows"],
+                "stage": stage["stage"],
+                "baseline_seconds": before["seconds"],
+                "seconds": stage["seconds"],
+                "ratio": round(ratio, 3),
+                "regression": ratio > 1 + tolerance
+            })
+
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark each Sales Decision Engine stage")
+    parser.add_argument(
+        "--rows",
+        type=float,
+        nargs="+",
+        default=DEFAULT_ROWS,
+        help="dataset sizes to benchmark, e.g. --rows 1e3 1e6 1e8"
+    )
+    parser.add_argument("--categories", type=int, default=8)
+    parser.add_argument("--regions", type=int, default=4)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--start", default="2021-01-01")
+    parser.add_argument("--end", default="2024-12-31")
+    parser.add_argument("--repeat", type=int, default=1, help="report the best of N runs")
+    parser.add_argument("--no-charts", action="store_true", help="skip the chart stages")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against an earlier results file")
+    args = parser.parse_args()
+
+    report = run_benchmarks(
+        [int(rows) for rows in args.rows],
+        repeat=args.repeat,
+        charts=not args.no_charts,
+        categories=args.categories,
+        regions=args.regions,
+        products=args.products,
+        start=args.start,
+        end=args.end
+    )
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(json.load(f), report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+
+    for run in report["runs"]:
+        for stage in run["stages"]:
+            print(
+                f"{stage['rows']:>12,}  {stage['stage']:<42}"
+                f"{stage['seconds']:>10.4f}s  {stage['peak_mb']:>10.1f} MB"
+            )
+
+    for row in report.get("comparison", []):
+        if row["regression"]:
+            print(f"⚠️ {row['stage']} @ {row['rows']:,} rows is {row['ratio']:.2f}x slower than baseline")
@@ -0,0 +1,95 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+REGIONS = ["North", "South", "East", "West", "Central", "North-East", "South-West", "Islands"]
+
+
+def generate_sales(
+    rows,
+    categories=8,
+    regions=4,
+    products=200,
+    start="2021-01-01",
+    end="2024-12-31",
+    seed=0
+):
+    rng = np.random.default_rng(seed)
+
+    days = pd.date_range(start, end, freq="D")
+    day_of_year = days.dayofyear.to_numpy()
+
+    # Mild upward trend plus yearly seasonality, so monthly totals move the
+    # way real sales do rather than being flat noise
+    weights = (
+        np.linspace(1.0, 1.5, len(days))
+        * (1 + 0.3 * np.sin(2 * np.pi * (day_of_year - 80) / 365))
+    )
+    weights /= weights.sum()
+
+    # Each product belongs to one category and has its own base price
+    product_category = np.arange(products) % categories
+    product_price = np.round(rng.lognormal(mean=7.5, sigma=1.2, size=products), -1) + 10
+
+    product = rng.integers(0, products, rows)
+    day = rng.choice(len(days), size=rows, p=weights)
+    region_names = [
+        REGIONS[i % len(REGIONS)] + (f"-{i // len(REGIONS)}" if i >= len(REGIONS) else "")
+        for i in range(regions)
+    ]
+
+    price = product_price[product] * rng.uniform(0.9, 1.1, rows)
+
+    return pd.DataFrame({
+        "date": days[day].strftime("%Y-%m-%d"),
+        "product": np.char.add("Product-", product.astype(str)),
+        "category": np.char.add("Category-", product_category[product].astype(str)),
+        "region": np.asarray(region_names)[rng.integers(0, regions, rows)],
+        "price": price.round(2),
+        "quantity": rng.poisson(3, rows) + 1
+    })
+
+
+def write_sales_csv(path, rows, chunk_rows=1_000_000, seed=0, **options):
+    # Written in chunks so files far larger than memory can be produced
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    written = 0
+    chunk = 0
+
+    with open(path, "w", newline="") as f:
+        while written < rows:
+            size = min(chunk_rows, rows - written)
+            df = generate_sales(size, seed=seed + chunk, **options)
+            df.to_csv(f, index=False, header=(chunk == 0))
+
+            written += size
+            chunk += 1
+
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic sales data")
+    parser.add_argument("path", help="CSV file to write")
+    parser.add_argument("--rows", type=float, default=1e5)
+    parser.add_argument("--categories", type=int, default=8)
+    parser.add_argument("--regions", type=int, default=4)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--start", default="2021-01-01")
+    parser.add_argument("--end", default="2024-12-31")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_sales_csv(
+        args.path,
+        int(args.rows),
+        seed=args.seed,
+        categories=args.categories,
+        regions=args.regions,
+        products=args.products,
+        start=args.start,
+        end=args.end
+    )
@@ -1,27 +1,91 @@
 import pandas as pd
 import numpy as np
 
-def detect_anomalies(monthly_df):
-    df = monthly_df.copy()
+from core.dates import month_key
 
-    mean_revenue = df["revenue"].mean()
-    std_revenue = df["revenue"].std()
+SEGMENT_DIMENSIONS = ["category", "region", "product"]
 
-    df["z_score"] = (df["revenue"] - mean_revenue) / std_revenue
+METHODS = ("zscore", "rolling", "robust")
 
-    anomalies = []
 
-    for _, row in df.iterrows():
-        if abs(row["z_score"]) > 2:
-            anomaly_type = (
-                "Unusual Spike" if row["z_score"] > 0 else "Unusual Drop"
-            )
+def _zscores(revenue, group_ids, method="zscore", window=6):
+    # revenue must be ordered by (group, month); group_ids labels each row
+    groups = revenue.groupby(group_ids)
 
-            anomalies.append({
-                "month": row["date"],
-                "revenue": round(row["revenue"], 2),
-                "type": anomaly_type,
-                "z_score": round(row["z_score"], 2)
-            })
+    if method == "zscore":
+        z = (revenue - groups.transform("mean")) / groups.transform("std")
 
-    return anomalies
+    elif method == "robust":
+        median = groups.transform("median")
+        deviation = (revenue - median).abs()
+        mad = deviation.groupby(group_ids).transform("median")
+        z = 0.6745 * (revenue - median) / mad
+
+    elif method == "rolling":
+        # Score each month against the `window` months before it. The rolling
+        # window runs over the whole column at once and rows whose window
+        # would reach into the previous segment are masked out.
+        previous = revenue.shift(1)
+        mean = previous.rolling(window).mean()
+        std = previous.rolling(window).std()
+        z = ((revenue - mean) / std).where(groups.cumcount() >= window)
+
+    else:
+        raise ValueError(f"Unknown anomaly method: {method}")
+
+    return z.replace([np.inf, -np.inf], np.nan)
+
+
+def detect_anomalies(monthly_df, method="zscore", threshold=2, window=6):
+    # Any pyramid level works; "month" then holds that level's period label
+    df = monthly_df.reset_index(drop=True)
+
+    z_score = _zscores(df["revenue"], np.zeros(len(df), dtype=int), method, window)
+    flagged = z_score.abs() > threshold
+
+    return [
+        {
+            "month": month,
+            "revenue": round(revenue, 2),
+            "type": "Unusual Spike" if z > 0 else "Unusual Drop",
+            "z_score": round(z, 2)
+        }
+        for month, revenue, z in zip(
+            df.loc[flagged, "date"].tolist(),
+            df.loc[flagged, "revenue"].tolist(),
+            z_score[flagged].tolist()
+        )
+    ]
+
+
+def detect_segment_anomalies(
+    df,
+    dimensions=SEGMENT_DIMENSIONS,
+    method="zscore",
+    threshold=2,
+    window=6
+):
+    # Works on a cleaned sales frame or a cube; every segment's monthly series
+    # is scored in one batched pass
+    dimensions = list(dimensions)
+    month = month_key(df)
+
+    series = (
+        df
+        .groupby(dimensions + [month], dropna=False, observed=True)["revenue"]
+        .sum()
+        .reset_index()
+    )
+
+    group_ids = series.groupby(dimensions, dropna=False, observed=True).ngroup()
+    series["z_score"] = _zscores(series["revenue"], group_ids, method, window)
+
+    anomalies = series[series["z_score"].abs() > threshold].reset_index(drop=True)
+
+    anomalies["month"] = anomalies["month"].astype(str)
+    anomalies["type"] = pd.Categorical(
+        np.where(anomalies["z_score"] > 0, "Unusual Spike", "Unusual Drop"),
+        categories=["Unusual Spike", "Unusual Drop"]
+    )
+
+    return anomalies[dimensions + ["month", "revenue", "z_score", "type"]]
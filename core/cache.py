@@ -0,0 +1,148 @@
+import hashlib
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from functools import wraps
+
+import pandas as pd
+
+# Caches live at module level so they survive Streamlit reruns, which
+# re-execute app.py but keep already imported modules
+_CACHES = {}
+
+# Hashes of frames returned from memoize, by object identity. Cached stage
+# results are shared objects, so hashing them again on every lookup would be
+# wasted work; callers must treat frames returned from a cache as read-only.
+# Any other frame is hashed on every call, as its owner may change it in place.
+_FRAME_HASHES = {}
+
+_MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _content_hash(df):
+    digest = hashlib.blake2b(digest_size=16)
+
+    if isinstance(df, pd.DataFrame):
+        digest.update(repr(list(df.columns)).encode())
+        digest.update(repr(list(df.dtypes.astype(str))).encode())
+
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+
+    return digest.hexdigest()
+
+
+def _register(result):
+    # Frames in a memoized result (directly or one level inside a dict, list
+    # or tuple) get their hash remembered, computed on first use
+    values = result.values() if isinstance(result, dict) else result
+
+    if not isinstance(result, (dict, list, tuple)):
+        values = [result]
+
+    for value in values:
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            key = id(value)
+            _FRAME_HASHES[key] = [weakref.ref(value, lambda ref, key=key: _forget(key, ref)), None]
+
+
+def _forget(key, ref):
+    # A newer frame may already reuse the id; only the dead entry is dropped
+    if _FRAME_HASHES.get(key, [None])[0] is ref:
+        del _FRAME_HASHES[key]
+
+
+def frame_hash(df):
+    known = _FRAME_HASHES.get(id(df))
+    if known is None or known[0]() is not df:
+        return _content_hash(df)
+
+    if known[1] is None:
+        known[1] = _content_hash(df)
+
+    return known[1]
+
+
+def _fingerprint(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return frame_hash(value)
+
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return hashlib.blake2b(value, digest_size=16).hexdigest()
+
+    if callable(value):
+        return f"{value.__module__}.{value.__qualname__}"
+
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def make_key(*args, **kwargs):
+    parts = [_fingerprint(arg) for arg in args]
+    parts += [f"{name}={_fingerprint(value)}" for name, value in sorted(kwargs.items())]
+
+    return hashlib.blake2b("|".join(parts).encode(), digest_size=16).hexdigest()
+
+
+def get_cache(name, maxsize=32):
+    if name not in _CACHES:
+        _CACHES[name] = LRUCache(maxsize)
+
+    return _CACHES[name]
+
+
+def memoize(maxsize=32):
+    # Results are keyed on a content hash of the arguments, so an unchanged
+    # DataFrame hits the cache even when it is a different object
+    def decorator(fn):
+        cache = get_cache(f"{fn.__module__}.{fn.__qualname__}", maxsize)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = make_key(*args, **kwargs)
+
+            result = cache.get(key, _MISSING)
+            if result is _MISSING:
+                result = fn(*args, **kwargs)
+                cache.put(key, result)
+                _register(result)
+
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
@@ -0,0 +1,79 @@
+import pandas as pd
+
+from core.dates import month_key
+from core.preprocessing import reduce_chunks
+
+CUBE_DIMENSIONS = ["date", "category", "region", "product"]
+
+# The daily cube keeps day-start timestamps in "date" and drops product
+DAILY_CUBE_DIMENSIONS = ["date", "category", "region"]
+
+
+def _partial_cube(df):
+    # Months are kept as month-start timestamps in the "date" column, so the
+    # cube can be passed anywhere a cleaned sales frame is expected
+    month = month_key(df).dt.to_timestamp().rename("date")
+
+    return (
+        df
+        .groupby([month, "category", "region", "product"], dropna=False, observed=True)
+        .agg(
+            revenue=("revenue", "sum"),
+            quantity=("quantity", "sum"),
+            rows=("revenue", "size")
+        )
+    )
+
+
+def build_cube(df):
+    cube = reduce_chunks(df, _partial_cube)
+    cube["rows"] = cube["rows"].astype("int64")
+
+    return cube.reset_index()
+
+
+def _partial_daily_cube(df):
+    day = df["date"].dt.normalize().rename("date")
+
+    return (
+        df
+        .groupby([day, "category", "region"], dropna=False, observed=True)
+        .agg(
+            revenue=("revenue", "sum"),
+            rows=("revenue", "size")
+        )
+    )
+
+
+def build_daily_cube(df):
+    # Day x category x region totals, so filtered daily trends are a slice
+    # of this rather than a regroup of the raw rows
+    cube = reduce_chunks(df, _partial_daily_cube)
+    cube["rows"] = cube["rows"].astype("int64")
+
+    return cube.reset_index()
+
+
+def daily_from_cube(daily_cube):
+    # Per-day totals of a (sliced) daily cube, in the daily_totals format
+    return (
+        daily_cube
+        .groupby(daily_cube["date"].dt.to_period("D").rename("date"))
+        .agg(
+            revenue=("revenue", "sum"),
+            rows=("rows", "sum")
+        )
+        .reset_index()
+    )
+
+
+def slice_cube(cube, categories=None, regions=None):
+    mask = pd.Series(True, index=cube.index)
+
+    if categories is not None:
+        mask &= cube["category"].isin(categories)
+
+    if regions is not None:
+        mask &= cube["region"].isin(regions)
+
+    return cube[mask]
@@ -1,13 +1,93 @@
-def validate_sales_data(df):
-    required = {"date", "product", "category", "region", "price", "quantity"}
+import os
+
+import numpy as np
+import pandas as pd
+
+from core.dates import parse_dates
+
+REQUIRED_COLUMNS = ["date", "product", "category", "region", "price", "quantity"]
+
+# Reason codes written next to every quarantined row, in the order the rules
+# are checked; a row is reported under the first rule it breaks
+NULL_VALUE = "NULL_VALUE"
+BAD_NUMBER = "BAD_NUMBER"
+BAD_DATE = "BAD_DATE"
+NON_POSITIVE_PRICE = "NON_POSITIVE_PRICE"
+NON_POSITIVE_QUANTITY = "NON_POSITIVE_QUANTITY"
+
+REASON_COLUMN = "reject_reason"
+
+
+def missing_columns(df):
+    return [column for column in REQUIRED_COLUMNS if column not in df.columns]
+
+
+def validate_rows(df, date_format=None):
+    # Checks every rule over whole columns at once and splits the frame into
+    # valid rows (price/quantity coerced to numbers, dates parsed, month key
+    # added) and rejected rows (original values plus a reason code). Given a
+    # date_format, dates that do not match it are BAD_DATE.
+    missing = missing_columns(df)
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+    price = pd.to_numeric(df["price"], errors="coerce")
+    quantity = pd.to_numeric(df["quantity"], errors="coerce")
+    dates, months = parse_dates(df["date"], errors="coerce", date_format=date_format)
+
+    null = df[REQUIRED_COLUMNS].isna().any(axis=1)
+    bad_number = price.isna() | quantity.isna()
+    bad_date = dates.isna()
 
-    if not required.issubset(df.columns):
+    reason = np.select(
+        [null, bad_number, bad_date, price <= 0, quantity <= 0],
+        [NULL_VALUE, BAD_NUMBER, BAD_DATE, NON_POSITIVE_PRICE, NON_POSITIVE_QUANTITY],
+        default=""
+    )
+    rejected = reason != ""
+
+    valid = df.loc[~rejected].copy()
+    valid["price"] = price[~rejected]
+    valid["quantity"] = quantity[~rejected]
+    valid["date"] = dates[~rejected]
+    valid["month"] = months[~rejected]
+
+    quarantined = df.loc[rejected].copy()
+    quarantined[REASON_COLUMN] = reason[rejected]
+
+    return valid, quarantined
+
+
+def quarantine_rows(rejected, path):
+    # Appends, so the rejects of every chunk of a streamed file end up in
+    # one side file
+    if rejected.empty:
+        return
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    rejected.to_csv(
+        path,
+        mode="a",
+        header=not os.path.exists(path),
+        index=True,
+        index_label="row"
+    )
+
+
+def validate_sales_data(df):
+    if missing_columns(df):
         return False, "Missing required columns"
 
-    if df.isnull().any().any():
+    _, rejected = validate_rows(df)
+    reasons = set(rejected[REASON_COLUMN])
+
+    if NULL_VALUE in reasons:
         return False, "Null values detected"
 
-    if (df["price"] <= 0).any() or (df["quantity"] <= 0).any():
+    if reasons & {BAD_NUMBER, NON_POSITIVE_PRICE, NON_POSITIVE_QUANTITY}:
         return False, "Invalid price or quantity"
 
+    if BAD_DATE in reasons:
+        return False, "Invalid date values"
+
     return True, "Valid"
@@ -0,0 +1,116 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Candidate date formats, tried in order against a sample of the distinct
+# values. Month-first comes before day-first to match pandas' own default.
+DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%m/%d/%Y",
+    "%d/%m/%Y",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%Y%m%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%m/%d/%Y %H:%M",
+    "%d/%m/%Y %H:%M"
+]
+
+DATE_SAMPLE_SIZE = 1000
+
+# When no format parses the whole sample (i.e. the file has bad dates), the
+# best format is still used if it parses at least this share of the sample
+MIN_FORMAT_MATCH = 0.9
+
+
+def detect_date_format(values):
+    sample = pd.Series(values[:DATE_SAMPLE_SIZE]).dropna().astype(str)
+
+    if sample.empty:
+        return None
+
+    best_format, best_ratio = None, 0.0
+
+    for date_format in DATE_FORMATS:
+        ratio = pd.to_datetime(sample, format=date_format, errors="coerce").notna().mean()
+
+        if ratio == 1.0:
+            return date_format
+
+        if ratio > best_ratio:
+            best_format, best_ratio = date_format, ratio
+
+    return best_format if best_ratio >= MIN_FORMAT_MATCH else None
+
+
+def file_date_format(values):
+    # The format of a file's text dates, detected from its first chunk and
+    # then passed to parse_dates for every later chunk, so no chunk can pick
+    # a different day/month order from its own values
+    uniques = pd.unique(values.dropna())
+
+    return detect_date_format([value for value in uniques if isinstance(value, str)])
+
+
+def _parse_unique(uniques, errors, date_format=None):
+    # Workbooks mix real date cells with text dates, so the two are parsed
+    # separately. Text uses the given format, or one detected from these
+    # values; with a detected format any value it misses gets a second chance
+    # with pandas' own inference, with a given one it is left unparsed.
+    parsed = pd.Series(pd.NaT, index=range(len(uniques)), dtype="datetime64[ns]")
+    text = np.fromiter((isinstance(value, str) for value in uniques), bool, len(uniques))
+
+    if (~text).any():
+        parsed[~text] = pd.to_datetime(uniques[~text], errors=errors).to_numpy()
+
+    if text.any():
+        strings = uniques[text]
+        pinned = date_format is not None
+        date_format = date_format or detect_date_format(strings)
+
+        # Without a detected format pandas infers one from the first value and
+        # warns that it had to; values that one misses are retried below
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            values = pd.Series(pd.to_datetime(strings, format=date_format, errors="coerce"))
+
+        missed = values.isna().to_numpy()
+
+        if missed.any() and not pinned:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", UserWarning)
+                values[missed] = pd.to_datetime(strings[missed], errors=errors).to_numpy()
+
+        parsed[text] = values.to_numpy()
+
+    return pd.DatetimeIndex(parsed)
+
+
+def parse_dates(values, errors="raise", date_format=None):
+    # Sales files repeat a few thousand distinct dates across millions of
+    # rows, so only the distinct values are parsed and the results are mapped
+    # back to the rows. The month key is derived the same way.
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values, values.dt.to_period("M")
+
+    codes, uniques = pd.factorize(values)
+    parsed = _parse_unique(pd.Index(uniques, dtype=object), errors, date_format)
+
+    dates = parsed.take(codes, allow_fill=True, fill_value=pd.NaT)
+    months = parsed.to_period("M").take(codes, allow_fill=True, fill_value=pd.NaT)
+
+    return (
+        pd.Series(dates, index=values.index, name=values.name),
+        pd.Series(months, index=values.index, name="month")
+    )
+
+
+def month_key(df):
+    # The month period of every row; cleaned frames carry it precomputed
+    if "month" in df.columns:
+        return df["month"]
+
+    return df["date"].dt.to_period("M").rename("month")
@@ -1,18 +1,24 @@
+import numpy as np
+
+TREND_ACTIONS = {
+    "Upward": "Scale operations and marketing",
+    "Downward": "Reduce costs and investigate decline",
+    "Stable": "Maintain current strategy"
+}
+
+
+def business_trends(trend):
+    # Average month-over-month change -> trend label, for one value or an array
+    trend = np.asarray(trend, dtype="float64")
+
+    return np.select([trend > 0, trend < 0], ["Upward", "Downward"], default="Stable")
+
+
 def business_decision(monthly):
     trend = monthly["revenue"].diff().mean()
+    health = str(business_trends(trend))
 
-    if trend > 0:
-        return {
-            "business_health": "Upward",
-            "action": "Scale operations and marketing"
-        }
-    elif trend < 0:
-        return {
-            "business_health": "Downward",
-            "action": "Reduce costs and investigate decline"
-        }
-    else:
-        return {
-            "business_health": "Stable",
-            "action": "Maintain current strategy"
-        }
+    return {
+        "business_health": health,
+        "action": TREND_ACTIONS[health]
+    }
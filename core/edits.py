@@ -0,0 +1,67 @@
+import pandas as pd
+
+from core.data_validator import validate_rows
+
+EDIT_KINDS = ("edited_rows", "added_rows", "deleted_rows")
+
+
+def has_changes(editor_state):
+    return any(editor_state.get(kind) for kind in EDIT_KINDS)
+
+
+def editor_changes(df, editor_state):
+    # Turns st.data_editor's change log (positions into df) into the original
+    # rows that are going away and the raw rows that replace them: edited
+    # copies plus newly added rows. Deleted rows only go away.
+    edited = {int(position): change for position, change in editor_state.get("edited_rows", {}).items()}
+    deleted = {int(position) for position in editor_state.get("deleted_rows", [])}
+
+    touched = sorted(set(edited) | deleted)
+    removed = df.iloc[touched]
+
+    replaced = df.iloc[[position for position in touched if position not in deleted]].astype(object)
+    for position, change in edited.items():
+        if position in deleted:
+            continue
+
+        for column, value in change.items():
+            if column in replaced.columns:
+                replaced.at[df.index[position], column] = value
+
+    added = pd.DataFrame(editor_state.get("added_rows", []), columns=df.columns, dtype=object)
+    start = int(df.index.max()) + 1 if len(df) else 0
+    added.index = pd.RangeIndex(start, start + len(added))
+
+    return removed, pd.concat([replaced, added])
+
+
+def edit_delta(df, editor_state):
+    # Validated (removed, added, rejected) rows with revenue; only the
+    # handful of touched rows are validated, never the whole table
+    removed, replacements = editor_changes(df, editor_state)
+    added, rejected = validate_rows(replacements)
+
+    # An edit that fails validation is ignored: the original row stays
+    removed = removed.loc[~removed.index.isin(rejected.index)]
+
+    removed = removed.assign(revenue=removed["price"] * removed["quantity"])
+    added = added.assign(revenue=added["price"] * added["quantity"])
+
+    return removed, added, rejected
+
+
+def apply_delta(totals, removed, added, keys):
+    # totals, removed and added are aggregates over the same keys whose other
+    # columns are additive and include a "rows" count. Removed totals are
+    # subtracted, added ones summed in, and groups left without rows dropped.
+    values = [column for column in removed.columns if column not in keys]
+    negated = removed.assign(**{column: -removed[column] for column in values})
+
+    combined = (
+        pd.concat([totals, negated, added], ignore_index=True)
+        .groupby(keys, observed=True, dropna=False)[values]
+        .sum()
+        .reset_index()
+    )
+
+    return combined[combined["rows"] > 0].reset_index(drop=True)
@@ -0,0 +1,72 @@
+import pandas as pd
+from openpyxl import load_workbook
+
+from core.data_validator import REQUIRED_COLUMNS
+
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+
+
+def is_excel(path):
+    return str(path).lower().endswith(EXCEL_EXTENSIONS)
+
+
+def _frame(columns, start):
+    df = pd.DataFrame(
+        {name: pd.Series(values, dtype=object) for name, values in columns.items()}
+    )
+    df.index = pd.RangeIndex(start, start + len(df))
+
+    return df
+
+
+def iter_excel_chunks(source, chunksize, sheets=None):
+    # Read-only mode streams rows from the workbook XML instead of building
+    # the whole workbook in memory. Only the required columns are kept, and
+    # every sheet that has them is read (sheets without them are skipped).
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    found = False
+    row_number = 0
+
+    try:
+        for name in sheets or workbook.sheetnames:
+            rows = workbook[name].iter_rows(values_only=True)
+            header = next(rows, None) or ()
+
+            positions = {
+                str(label).strip(): i
+                for i, label in enumerate(header)
+                if label is not None
+            }
+            if not set(REQUIRED_COLUMNS).issubset(positions):
+                continue
+
+            found = True
+            indexes = [positions[column] for column in REQUIRED_COLUMNS]
+            columns = {column: [] for column in REQUIRED_COLUMNS}
+            start = row_number
+
+            for row in rows:
+                values = [row[i] if i < len(row) else None for i in indexes]
+
+                # Formatted but empty rows at the bottom of a sheet
+                if all(value is None for value in values):
+                    continue
+
+                for column, value in zip(REQUIRED_COLUMNS, values):
+                    columns[column].append(value)
+                row_number += 1
+
+                if row_number - start == chunksize:
+                    yield _frame(columns, start)
+                    columns = {column: [] for column in REQUIRED_COLUMNS}
+                    start = row_number
+
+            if row_number > start:
+                yield _frame(columns, start)
+    finally:
+        workbook.close()
+
+    if not found:
+        raise ValueError(
+            f"Missing required columns: no sheet has {', '.join(REQUIRED_COLUMNS)}"
+        )
@@ -1,28 +1,160 @@
 import numpy as np
 import pandas as pd
 
-def forecast_next_months(monthly_df, months=3):
-    last_revenue = monthly_df.iloc[-1]["revenue"]
+from core.dates import month_key
 
-    # Calculate historical volatility
-    volatility = monthly_df["revenue"].pct_change().std()
-    volatility = 0.05 if pd.isna(volatility) else volatility  # safety
+FORECAST_PATHS = 1000
+FORECAST_SEED = 42
 
+# Empirical quantiles of the simulated paths used as the confidence range
+FORECAST_QUANTILES = (0.10, 0.90)
+
+DEFAULT_VOLATILITY = 0.05
+
+# Series simulated at a time when forecasting many series at once
+SIMULATION_BLOCK = 1024
+
+
+def simulate_paths(last_revenue, volatility, months=3, paths=FORECAST_PATHS, seed=FORECAST_SEED):
+    # Random up/down movement (stock-style) for S series at once:
+    # returns an array of shape (series, paths, months)
+    last_revenue = np.asarray(last_revenue, dtype="float64")
+    volatility = np.asarray(volatility, dtype="float64")
+
+    rng = np.random.default_rng(seed)
+    shocks = rng.standard_normal((len(last_revenue), paths, months))
+    shocks *= volatility[:, None, None]
+
+    # Revenue cannot go below zero, however volatile the history
+    growth = np.maximum(1 + shocks, 0)
+
+    return last_revenue[:, None, None] * np.cumprod(growth, axis=2)
+
+
+def predicted_revenue(last_revenue, volatility, months=3, paths=FORECAST_PATHS, seed=FORECAST_SEED):
+    # Mean simulated revenue per month for many series (shape: series x
+    # months). Every series is driven by the same shocks, the ones a single
+    # forecast_next_months call draws, so each row equals that series' own
+    # forecast and differences between rows come from the inputs alone.
+    # Series are simulated in blocks to bound memory.
+    last_revenue = np.asarray(last_revenue, dtype="float64")
+    volatility = np.asarray(volatility, dtype="float64")
+
+    shocks = np.random.default_rng(seed).standard_normal((paths, months))
+    predicted = np.empty((len(last_revenue), months))
+
+    for start in range(0, len(last_revenue), SIMULATION_BLOCK):
+        block = slice(start, start + SIMULATION_BLOCK)
+        growth = np.maximum(1 + shocks * volatility[block, None, None], 0)
+        predicted[block] = last_revenue[block, None] * np.cumprod(growth, axis=2).mean(axis=1)
+
+    return predicted
+
+
+def forecast_ranges(last_revenue, volatility, months=3, paths=FORECAST_PATHS, seed=FORECAST_SEED):
+    # Mean and quantile range of the simulated revenue per month for many
+    # series (each series x months). As in predicted_revenue every series is
+    # driven by the shocks a single forecast_next_months call draws, so each
+    # row is that series' own forecast, and series are simulated and
+    # summarised in blocks, so memory does not grow with their number.
+    last_revenue = np.asarray(last_revenue, dtype="float64")
+    volatility = np.asarray(volatility, dtype="float64")
+
+    shocks = np.random.default_rng(seed).standard_normal((paths, months))
+    predicted, lower, upper = (np.empty((len(last_revenue), months)) for _ in range(3))
+
+    for start in range(0, len(last_revenue), SIMULATION_BLOCK):
+        block = slice(start, start + SIMULATION_BLOCK)
+
+        simulated = shocks * volatility[block, None, None]
+        simulated += 1
+        np.maximum(simulated, 0, out=simulated)
+        np.cumprod(simulated, axis=2, out=simulated)
+        simulated *= last_revenue[block, None, None]
+
+        predicted[block], lower[block], upper[block] = _summarise_paths(simulated)
+
+    return predicted, lower, upper
+
+
+def _summarise_paths(paths):
+    predicted = paths.mean(axis=1)
+    lower, upper = np.quantile(paths, FORECAST_QUANTILES, axis=1)
+
+    return predicted, lower, upper
+
+
+def forecast_volatility(matrix):
+    # Std of month-over-month % change per row; rows with too little history
+    # fall back to the default
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = matrix[:, 1:] / matrix[:, :-1] - 1
+
+    growth = pd.DataFrame(growth).replace([np.inf, -np.inf], np.nan)
+    volatility = growth.std(axis=1).to_numpy()
+
+    return np.where(np.isnan(volatility), DEFAULT_VOLATILITY, volatility)
+
+
+def forecast_next_months(monthly_df, months=3, paths=FORECAST_PATHS, seed=FORECAST_SEED):
+    revenue = monthly_df["revenue"].to_numpy(dtype="float64")
     last_date = pd.Period(monthly_df.iloc[-1]["date"], freq="M")
 
-    forecast = []
-    current = last_revenue
+    simulated = simulate_paths(
+        revenue[-1:],
+        forecast_volatility(revenue[None, :]),
+        months,
+        paths,
+        seed
+    )
+    predicted, lower, upper = _summarise_paths(simulated)
+
+    return [
+        {
+            "month": str(last_date + i + 1),
+            "predicted_revenue": round(float(predicted[0, i]), 2),
+            "lower_bound": round(float(lower[0, i]), 2),
+            "upper_bound": round(float(upper[0, i]), 2)
+        }
+        for i in range(months)
+    ]
+
+
+def forecast_segments(
+    df,
+    dimensions=("category", "region"),
+    months=3,
+    paths=FORECAST_PATHS,
+    seed=FORECAST_SEED
+):
+    # Forecasts every value of every dimension (e.g. each category and each
+    # region) in one blocked simulation. Works on a cleaned frame or a cube.
+    month = month_key(df)
+    matrices = []
+
+    for dimension in dimensions:
+        matrix = (
+            df
+            .groupby([df[dimension], month], observed=True)["revenue"]
+            .sum()
+            .unstack(fill_value=0)
+        )
+        matrix.index = pd.MultiIndex.from_product([[dimension], matrix.index])
+        matrices.append(matrix)
+
+    matrix = pd.concat(matrices).fillna(0).sort_index(axis=1)
+    values = matrix.to_numpy(dtype="float64")
 
-    for i in range(1, months + 1):
-        # Random up/down movement (stock-style)
-        change_pct = np.random.normal(0, volatility)
-        current = current * (1 + change_pct)
+    predicted, lower, upper = forecast_ranges(values[:, -1], forecast_volatility(values), months, paths, seed)
 
-        forecast.append({
-            "month": str(last_date + i),
-            "predicted_revenue": round(current, 2),
-            "lower_bound": round(current * 0.90, 2),
-            "upper_bound": round(current * 1.10, 2)
-        })
+    last_date = matrix.columns[-1]
+    horizon = [str(last_date + i + 1) for i in range(months)]
 
-    return forecast
+    return pd.DataFrame({
+        "dimension": np.repeat(matrix.index.get_level_values(0), months),
+        "segment": np.repeat(matrix.index.get_level_values(1), months),
+        "month": np.tile(horizon, len(matrix)),
+        "predicted_revenue": predicted.ravel().round(2),
+        "lower_bound": lower.ravel().round(2),
+        "upper_bound": upper.ravel().round(2)
+    })
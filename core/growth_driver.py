@@ -1,8 +1,89 @@
+from core.preprocessing import reduce_chunks
+
+
+def _category_revenue(df):
+    return df.groupby('category', observed=True)['revenue'].sum()
+
+
 def category_performance(df):
     return (
-        df
-        .groupby('category')['revenue']
-        .sum()
+        reduce_chunks(df, _category_revenue)
         .sort_values(ascending=False)
         .reset_index()
     )
+
+
+def _region_revenue(df):
+    return df.groupby('region', observed=True)['revenue'].sum()
+
+
+def region_performance(df):
+    return (
+        reduce_chunks(df, _region_revenue)
+        .sort_values(ascending=False)
+        .reset_index()
+    )
+
+
+# Drill-down hierarchies: name -> (parent level, child level)
+RANKING_HIERARCHIES = {
+    "category": ("category", "product"),
+    "region": ("region", "product")
+}
+
+RANKING_SIZE = 3
+
+
+def _leaf_revenue(df, columns):
+    return df.groupby(columns, observed=True)['revenue'].sum()
+
+
+def _records(revenue, column):
+    return [
+        {column: label, "revenue": round(float(value), 2)}
+        for label, value in revenue.items()
+    ]
+
+
+def _ranked_children(children, parent, child, k, largest):
+    # nlargest/nsmallest per parent only select k rows from each group
+    # instead of sorting the whole catalogue
+    groups = children.groupby(level=parent, observed=True, group_keys=False)
+    picked = groups.nlargest(k) if largest else groups.nsmallest(k)
+
+    ranked = {}
+    for (parent_label, child_label), value in picked.items():
+        ranked.setdefault(parent_label, []).append(
+            {child: child_label, "revenue": round(float(value), 2)}
+        )
+
+    return ranked
+
+
+def drill_down_rankings(df, k=RANKING_SIZE, hierarchies=RANKING_HIERARCHIES):
+    # One grouped pass over the rows (or a cube, or chunks) down to the finest
+    # combination of levels; every hierarchy is then ranked from those totals.
+    # Returns, per hierarchy, the top/bottom k parents and the top/bottom k
+    # children of each parent.
+    columns = list(dict.fromkeys(
+        level
+        for levels in hierarchies.values()
+        for level in levels
+    ))
+
+    leaf = reduce_chunks(df, lambda chunk: _leaf_revenue(chunk, columns))
+
+    rankings = {}
+
+    for name, (parent, child) in hierarchies.items():
+        totals = leaf.groupby(level=parent, observed=True).sum()
+        children = leaf.groupby(level=[parent, child], observed=True).sum()
+
+        rankings[name] = {
+            "top": _records(totals.nlargest(k), parent),
+            "bottom": _records(totals.nsmallest(k), parent),
+            "top_children": _ranked_children(children, parent, child, k, largest=True),
+            "bottom_children": _ranked_children(children, parent, child, k, largest=False)
+        }
+
+    return rankings
@@ -0,0 +1,291 @@
+import hashlib
+import io
+import json
+import os
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from core.cube import build_cube
+from core.dates import file_date_format
+from core.excel_reader import is_excel
+from core.preprocessing import (
+    CHUNK_SIZE,
+    CSV_DTYPES,
+    REQUIRED_COLUMNS,
+    clean_data,
+    load_and_clean_data
+)
+
+STATE_DIR = "output/state"
+
+# Appended text is read in blocks of about this many bytes, each cut back to
+# its last complete line
+READ_BLOCK_BYTES = 64 * 2**20
+
+# The state is only resumed if the first and the last this many bytes before
+# the stored offset are unchanged; otherwise the file was replaced or
+# rewritten and the totals are rebuilt
+CHECKSUM_BYTES = 64 * 2**10
+
+# Two small aggregate tables instead of the full cube: month x category x
+# region totals (trend, KPIs, anomalies, risk, segment scores) and category x
+# region x product totals without the month (drill-down rankings). New rows
+# are upserted, so a run only writes the keys it touched.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    date TEXT NOT NULL,
+    category TEXT NOT NULL,
+    region TEXT NOT NULL,
+    revenue REAL NOT NULL,
+    quantity NUMERIC NOT NULL,
+    rows INTEGER NOT NULL,
+    PRIMARY KEY (date, category, region)
+);
+CREATE TABLE IF NOT EXISTS products (
+    category TEXT NOT NULL,
+    region TEXT NOT NULL,
+    product TEXT NOT NULL,
+    revenue REAL NOT NULL,
+    quantity NUMERIC NOT NULL,
+    rows INTEGER NOT NULL,
+    PRIMARY KEY (category, region, product)
+);
+"""
+
+TABLE_KEYS = {
+    "segments": ["date", "category", "region"],
+    "products": ["category", "region", "product"]
+}
+
+
+def _state_path(state_dir):
+    return os.path.join(state_dir, "state.sqlite")
+
+
+def _connect(state_dir):
+    os.makedirs(state_dir, exist_ok=True)
+
+    conn = sqlite3.connect(_state_path(state_dir), timeout=30)
+    conn.executescript(SCHEMA)
+
+    return conn
+
+
+def _read_meta(conn):
+    rows = conn.execute("SELECT key, value FROM meta").fetchall()
+
+    return {key: json.loads(value) for key, value in rows} or None
+
+
+def _read_tables(conn):
+    segments = pd.read_sql_query(
+        "SELECT * FROM segments ORDER BY date, category, region",
+        conn,
+        parse_dates=["date"]
+    )
+    products = pd.read_sql_query(
+        "SELECT * FROM products ORDER BY category, region, product",
+        conn
+    )
+
+    return segments, products
+
+
+def load_state(state_dir=STATE_DIR):
+    if not os.path.exists(_state_path(state_dir)):
+        return None, None, None
+
+    with closing(_connect(state_dir)) as conn:
+        return (_read_meta(conn), *_read_tables(conn))
+
+
+def _aggregates(rows):
+    # Cleaned rows -> the two state tables' totals, keyed like the tables
+    cube = build_cube(rows)
+    cube["date"] = cube["date"].dt.strftime("%Y-%m-%d")
+
+    return {
+        table: (
+            cube
+            .groupby(keys, observed=True)[["revenue", "quantity", "rows"]]
+            .sum()
+            .reset_index()
+            .astype({key: str for key in keys})
+        )
+        for table, keys in TABLE_KEYS.items()
+    }
+
+
+def _upsert(conn, rows):
+    # Adds the new rows' totals onto the stored ones; untouched keys are
+    # neither read nor written
+    for table, totals in _aggregates(rows).items():
+        keys = TABLE_KEYS[table]
+        columns = keys + ["revenue", "quantity", "rows"]
+
+        conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET "
+            "revenue = revenue + excluded.revenue, "
+            "quantity = quantity + excluded.quantity, "
+            "rows = rows + excluded.rows",
+            totals[columns].itertuples(index=False, name=None)
+        )
+
+
+def _iter_new_rows(path, offset, first_row=0, quarantine_path=None, date_format=None):
+    # Cleaned rows appended after byte `offset`, in blocks; yields (rows,
+    # offset after the block, rows read so far, date format). Blocks are cut
+    # back to their last newline and the rest is carried into the next block;
+    # at the end of the file what is left is the last row, even without a
+    # trailing newline. Rows keep their row number in the file, so quarantined
+    # rows can be found again. Dates are parsed with the file's format (stored
+    # in the state), detected from the first block when it is not known yet.
+    with open(path, "rb") as f:
+        header = f.readline()
+        position = max(offset, len(header))
+        f.seek(position)
+        pending = b""
+
+        while True:
+            block = f.read(READ_BLOCK_BYTES)
+            data = pending + block
+
+            if block:
+                cut = data.rfind(b"\n") + 1
+                data, pending = data[:cut], data[cut:]
+
+            if data.strip():
+                df = pd.read_csv(
+                    io.BytesIO(header + data),
+                    usecols=REQUIRED_COLUMNS,
+                    dtype=CSV_DTYPES
+                )
+                df.index = pd.RangeIndex(first_row, first_row + len(df))
+
+                if date_format is None:
+                    date_format = file_date_format(df["date"])
+
+                position += len(data)
+                first_row += len(df)
+
+                yield clean_data(df, quarantine_path, date_format), position, first_row, date_format
+
+            if not block:
+                break
+
+
+def _checksum(path, offset):
+    # Fingerprint of the ingested bytes: the start of the file (header and
+    # first rows) and the block right before the offset
+    digest = hashlib.blake2b(digest_size=16)
+
+    with open(path, "rb") as f:
+        digest.update(f.read(min(offset, CHECKSUM_BYTES)))
+        f.seek(max(offset - CHECKSUM_BYTES, 0))
+        digest.update(f.read(min(offset, CHECKSUM_BYTES)))
+
+    return digest.hexdigest()
+
+
+def _continues_last_line(path, offset):
+    # The last ingested row had no newline yet and the file now goes on along
+    # the same line: a writer was still appending it, so it was read short
+    with open(path, "rb") as f:
+        f.seek(max(offset - 1, 0))
+        tail = f.read(2)
+
+    return len(tail) == 2 and tail[:1] != b"\n" and tail[1:] not in (b"\n", b"\r")
+
+
+def _watermark(dates, previous=None):
+    dates = [d for d in dates if pd.notna(d)]
+
+    if previous is not None:
+        dates.append(pd.Timestamp(previous))
+
+    return str(max(dates).date()) if dates else None
+
+
+def _ingest(conn, chunks, meta):
+    latest, new_rows = [], 0
+
+    for rows, offset, rows_read, date_format in chunks:
+        if not rows.empty:
+            _upsert(conn, rows)
+            latest.append(rows["date"].max())
+            new_rows += len(rows)
+
+        meta = dict(meta, offset=offset, rows_read=rows_read, date_format=date_format)
+
+    return dict(
+        meta,
+        watermark=_watermark(latest, meta.get("watermark")),
+        new_rows=new_rows
+    )
+
+
+def _excel_chunks(path, quarantine_path):
+    for rows in load_and_clean_data(path, CHUNK_SIZE, quarantine_path):
+        yield rows, os.path.getsize(path), 0, None
+
+
+def update_state(path, state_dir=STATE_DIR, quarantine_path=None):
+    # Returns (meta, segments, products): the watermark/offset metadata and
+    # the two aggregate tables, which stand in for the cleaned rows
+    if quarantine_path and os.path.exists(quarantine_path):
+        os.remove(quarantine_path)
+
+    with closing(_connect(state_dir)) as conn, conn:
+        meta = _read_meta(conn)
+
+        # Byte offsets only make sense for append-only text files; workbooks
+        # are always rebuilt, and so is a file whose ingested bytes changed
+        stale = (
+            is_excel(path)
+            or meta is None
+            or meta.get("source") != os.path.abspath(path)
+            or os.path.getsize(path) < meta.get("offset", 0)
+            or meta.get("checksum") != _checksum(path, meta["offset"])
+            or _continues_last_line(path, meta["offset"])
+        )
+
+        if stale:
+            conn.execute("DELETE FROM segments")
+            conn.execute("DELETE FROM products")
+
+            meta = {"source": os.path.abspath(path), "mode": "full"}
+            chunks = (
+                _excel_chunks(path, quarantine_path) if is_excel(path)
+                else _iter_new_rows(path, 0, 0, quarantine_path)
+            )
+        else:
+            meta = dict(meta, mode="incremental")
+            chunks = _iter_new_rows(
+                path,
+                meta["offset"],
+                meta.get("rows_read", 0),
+                quarantine_path,
+                meta.get("date_format")
+            )
+
+        meta = _ingest(conn, chunks, dict(meta, offset=meta.get("offset", 0)))
+        meta["checksum"] = _checksum(path, meta["offset"])
+
+        # Written in the same transaction as the totals, so the watermark and
+        # offset never disagree with the tables
+        conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [(key, json.dumps(value)) for key, value in meta.items()]
+        )
+
+        segments, products = _read_tables(conn)
+
+    return meta, segments, products
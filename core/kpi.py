@@ -1,4 +1,11 @@
-def generate_kpis(monthly):
+from core.time_series import PERIOD_NAMES
+
+
+def generate_kpis(monthly, granularity="monthly"):
+    # Works on any pyramid level; key names follow the level
+    # (avg_weekly_revenue / best_week, ...)
+    period = PERIOD_NAMES[granularity]
+
     avg = monthly["revenue"].mean()
 
     
@@ -13,8 +20,8 @@ def generate_kpis(monthly):
     volatility = monthly["revenue"].std()
 
     return {
-        "avg_monthly_revenue": round(avg, 2),
-        "best_month": str(best),
-        "worst_month": str(worst),
+        f"avg_{granularity}_revenue": round(avg, 2),
+        f"best_{period}": str(best),
+        f"worst_{period}": str(worst),
         "revenue_volatility": round(volatility, 2)
     }
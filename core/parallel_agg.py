@@ -0,0 +1,192 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from core.dates import month_key
+
+PARTITION_WORKERS = os.cpu_count() or 1
+
+# Row blocks per worker; a few more than one keeps every worker busy
+BLOCKS_PER_WORKER = 4
+
+# Rollups the partials can be merged into, by the columns they keep.
+# "product" is the leaf drill_down_rankings ranks its hierarchies from.
+TOTAL_LEVELS = {
+    "monthly": ["date"],
+    "category": ["category"],
+    "region": ["region"],
+    "segment": ["date", "category", "region"],
+    "product": ["category", "region", "product"]
+}
+
+# Every block is summed with np.bincount and the block sums are added in
+# block order. Floating-point sums depend on their order, so the totals are
+# not bit-for-bit those of a single-process groupby; they agree with it after
+# rounding to cents, the precision every report uses.
+
+
+def _codes(values):
+    # Codes and the key of every code; categorical columns keep their own
+    # codes and categories, so the keys have the frame's dtype
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        keys = pd.Categorical.from_codes(np.arange(len(values.cat.categories)), dtype=values.dtype)
+        return values.cat.codes.to_numpy(), pd.Series(keys)
+
+    codes, keys = pd.factorize(values, sort=True)
+    return codes, pd.Series(keys)
+
+
+def _month_ordinals(values):
+    # Monthly period ordinals count months from 1970-01, exactly what numpy's
+    # datetime64[M] holds. Raw dates are converted per block in the workers,
+    # as the conversion is the slowest step.
+    if values.dtype.kind == "M":
+        return values.astype("datetime64[M]").astype("int64")
+
+    return values
+
+
+def _axes(df, names):
+    # Per-row codes and the keys along each axis the levels need. Months are
+    # period ordinals (or the dates themselves for frames without a month
+    # column) and are offset by the first month in the workers; months
+    # without rows are dropped again when the totals are built.
+    axes, first = {}, 0
+
+    for name in names:
+        if name != "date":
+            axes[name] = _codes(df[name])
+            continue
+
+        if "month" in df.columns:
+            months = month_key(df).array.asi8
+        else:
+            months = df["date"].to_numpy()
+
+        first, last = _month_ordinals(np.array([months.min(), months.max()])) if len(months) else (0, -1)
+        periods = pd.PeriodIndex.from_ordinals(np.arange(first, last + 1), freq="M")
+        axes[name] = (months, pd.Series(periods.to_timestamp()))
+
+    return axes, int(first)
+
+
+def _share(values):
+    shared = SharedMemory(create=True, size=max(values.nbytes, 1))
+    np.ndarray(values.shape, values.dtype, buffer=shared.buf)[:] = values
+
+    return shared
+
+
+def _partial_sums(layout, length, month_axis, first, shapes, start, end):
+    # Revenue sum and row count per group of every level for rows start:end,
+    # read straight from shared memory. layout is (segment name, dtype) per
+    # axis, revenue last; shapes lists, per level, (axis, axis size) pairs.
+    # Workers share the parent's resource tracker; the parent unlinks the
+    # segments once every block is done.
+    segments = [SharedMemory(name=name) for name, _ in layout]
+
+    try:
+        *codes, revenue = [
+            np.ndarray((length,), dtype, buffer=segment.buf)[start:end]
+            for segment, (_, dtype) in zip(segments, layout)
+        ]
+
+        if month_axis is not None:
+            codes[month_axis] = _month_ordinals(codes[month_axis]) - first
+
+        partials = []
+        for shape in shapes:
+            group = np.zeros(end - start, dtype="int64")
+            for axis, size in shape:
+                group = group * size + codes[axis]
+
+            size = math.prod(size for _, size in shape)
+            partials.append((
+                np.bincount(group, weights=revenue, minlength=size),
+                np.bincount(group, minlength=size)
+            ))
+
+        # Views into the segments must be gone before they can be closed
+        del codes, revenue
+    finally:
+        for segment in segments:
+            segment.close()
+
+    return partials
+
+
+def _block_bounds(length, workers):
+    bounds = np.linspace(0, length, workers * BLOCKS_PER_WORKER + 1).astype(int)
+
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def partitioned_totals(df, levels=tuple(TOTAL_LEVELS), workers=PARTITION_WORKERS):
+    # Revenue and row count of a cleaned frame (or cube) at each requested
+    # level of TOTAL_LEVELS, summed over row blocks in worker processes.
+    # The needed code columns and revenue are copied into shared memory once;
+    # a worker is only sent the segment names and its block bounds, and
+    # returns per-group sums. Returns {level: frame of key columns, revenue,
+    # rows}; each frame can be passed to monthly_sales / category_performance
+    # / region_performance / drill_down_rankings in place of the full frame.
+    names = list(dict.fromkeys(name for level in levels for name in TOTAL_LEVELS[level]))
+    axes, first = _axes(df, names)
+
+    columns = [axes[name][0] for name in names] + [df["revenue"].to_numpy(dtype="float64")]
+    sizes = {name: len(keys) for name, (_, keys) in axes.items()}
+    shapes = [
+        [(names.index(name), sizes[name]) for name in TOTAL_LEVELS[level]]
+        for level in levels
+    ]
+
+    length = len(df)
+    blocks = _block_bounds(length, workers)
+
+    segments = [_share(values) for values in columns]
+    layout = [(segment.name, values.dtype.str) for segment, values in zip(segments, columns)]
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(
+                _partial_sums,
+                [layout] * len(blocks),
+                [length] * len(blocks),
+                [names.index("date") if "date" in names else None] * len(blocks),
+                [first] * len(blocks),
+                [shapes] * len(blocks),
+                *zip(*blocks)
+            ))
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+    totals = {}
+    for index, level in enumerate(levels):
+        level_names = TOTAL_LEVELS[level]
+        shape = [sizes[name] for name in level_names]
+
+        revenue = np.zeros(math.prod(shape))
+        rows = np.zeros(math.prod(shape), dtype="int64")
+        for partials in results:
+            revenue += partials[index][0]
+            rows += partials[index][1]
+
+        # Only groups that have rows, in key order
+        observed = np.flatnonzero(rows)
+        positions = np.unravel_index(observed, shape)
+
+        frame = pd.DataFrame({
+            name: axes[name][1].iloc[position].reset_index(drop=True)
+            for name, position in zip(level_names, positions)
+        })
+        frame["revenue"] = revenue[observed]
+        frame["rows"] = rows[observed]
+
+        totals[level] = frame
+
+    return totals
@@ -1,9 +1,133 @@
+import os
+
 import pandas as pd
 
-def load_and_clean_data(path):
-    df = pd.read_csv(path)
+from core.dates import file_date_format
+from core.data_validator import REQUIRED_COLUMNS, quarantine_rows, validate_rows
+from core.excel_reader import is_excel, iter_excel_chunks
+
+# Explicit dtypes for streaming ingestion, so pandas never has to infer
+# (and re-infer per chunk) the text columns. price and quantity are left to
+# the C parser: a stray non-numeric value must reach the validator as a
+# rejected row rather than abort the read.
+CSV_DTYPES = {
+    "date": str,
+    "product": str,
+    "category": str,
+    "region": str
+}
+
+CHUNK_SIZE = 500_000
+
+DIMENSION_COLUMNS = ["product", "category", "region"]
+
+
+def _downcast(values):
+    # Smallest dtype that holds every value exactly; anything else is left alone
+    if pd.api.types.is_float_dtype(values) and (values % 1 == 0).all():
+        values = values.astype("int64")
+
+    if pd.api.types.is_integer_dtype(values):
+        return pd.to_numeric(values, downcast="integer")
+
+    narrow = values.astype("float32")
+    return narrow if (narrow.astype("float64") == values).all() else values
+
 
-    df['date'] = pd.to_datetime(df['date'])
-    df['revenue'] = df['price'] * df['quantity']
+def compact_frame(df):
+    # Dimension columns become dictionary-encoded categoricals and price /
+    # quantity are downcast. Revenue must be computed before calling this.
+    for column in DIMENSION_COLUMNS:
+        df[column] = df[column].astype("category")
+
+    df['price'] = _downcast(df['price'])
+    df['quantity'] = _downcast(df['quantity'])
 
     return df
+
+
+def memory_report(df):
+    usage = df.memory_usage(deep=True, index=False)
+
+    return {
+        "rows": len(df),
+        "total_mb": round(float(usage.sum()) / 2**20, 3),
+        "columns_mb": {column: round(float(size) / 2**20, 3) for column, size in usage.items()}
+    }
+
+
+def clean_data(df, quarantine_path=None, date_format=None):
+    # Rows that fail validation are dropped (and written to the quarantine
+    # file, if one is given) instead of failing the whole file
+    df, rejected = validate_rows(df, date_format)
+
+    if quarantine_path:
+        quarantine_rows(rejected, quarantine_path)
+
+    # Revenue is always computed in float64 from the full-width inputs, so
+    # downcasting price/quantity afterwards can never overflow it
+    df['revenue'] = df['price'].astype('float64') * df['quantity']
+
+    return compact_frame(df)
+
+
+def _clean_chunks(chunks, quarantine_path=None):
+    # The date format is detected once, from the first chunk with text dates,
+    # and every chunk is parsed with it
+    date_format = None
+
+    for chunk in chunks:
+        if date_format is None:
+            date_format = file_date_format(chunk["date"])
+
+        yield clean_data(chunk, quarantine_path, date_format)
+
+
+def _iter_clean_chunks(path, chunksize, quarantine_path=None, sheets=None):
+    if is_excel(path):
+        yield from _clean_chunks(iter_excel_chunks(path, chunksize, sheets), quarantine_path)
+        return
+
+    with pd.read_csv(
+        path,
+        usecols=REQUIRED_COLUMNS,
+        dtype=CSV_DTYPES,
+        chunksize=chunksize
+    ) as reader:
+        yield from _clean_chunks(reader, quarantine_path)
+
+
+def load_and_clean_data(path, chunksize=None, quarantine_path=None, sheets=None):
+    # The quarantine file only ever holds the rejects of the latest load
+    if quarantine_path and os.path.exists(quarantine_path):
+        os.remove(quarantine_path)
+
+    # With a chunksize the file is streamed: an iterator of cleaned chunks is
+    # returned instead of one DataFrame, so memory is bounded by the chunk size.
+    # Excel workbooks (.xlsx/.xlsm) go through the same chunked pipeline.
+    if chunksize:
+        return _iter_clean_chunks(path, chunksize, quarantine_path, sheets)
+
+    if is_excel(path):
+        df = pd.concat(iter_excel_chunks(path, CHUNK_SIZE, sheets))
+    else:
+        df = pd.read_csv(path)
+
+    return clean_data(df, quarantine_path)
+
+
+def reduce_chunks(df, aggregate):
+    # Runs a grouped aggregation over a cleaned DataFrame, or over an
+    # iterable of cleaned chunks by adding up the per-chunk partials. Added
+    # partials align on the union of their keys, so they are sorted again
+    # to come out in the order one groupby would give.
+    if isinstance(df, pd.DataFrame):
+        return aggregate(df)
+
+    total = None
+
+    for chunk in df:
+        partial = aggregate(chunk)
+        total = partial if total is None else total.add(partial, fill_value=0)
+
+    return total.sort_index()
@@ -0,0 +1,93 @@
+import cProfile
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Setting SALES_ENGINE_PROFILE=1 turns profiling on without code changes;
+# SALES_ENGINE_PROFILE_OUT additionally writes a cProfile dump to that path
+PROFILE_ENV = "SALES_ENGINE_PROFILE"
+PROFILE_OUT_ENV = "SALES_ENGINE_PROFILE_OUT"
+
+
+def profiling_requested():
+    return os.environ.get(PROFILE_ENV, "").lower() in ("1", "true", "yes")
+
+
+class StageProfiler:
+    def __init__(self, enabled=False, profile_path=None):
+        self.enabled = enabled or bool(profile_path)
+        self.profile_path = profile_path
+        self.stages = {}
+        self._profiler = cProfile.Profile() if profile_path else None
+        self._started = None
+        self._owns_tracemalloc = False
+
+    def start(self):
+        if not self.enabled:
+            return self
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+
+        if self._profiler is not None:
+            self._profiler.enable()
+
+        self._started = time.perf_counter()
+        return self
+
+    def stop(self):
+        if not self.enabled:
+            return
+
+        if self._profiler is not None:
+            self._profiler.disable()
+            os.makedirs(os.path.dirname(self.profile_path) or ".", exist_ok=True)
+            self._profiler.dump_stats(self.profile_path)
+
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            _, peak = tracemalloc.get_traced_memory()
+
+            # A stage entered more than once (e.g. charts drawn in several
+            # places) accumulates into one entry
+            timing = self.stages.setdefault(
+                name,
+                {"wall_seconds": 0.0, "cpu_seconds": 0.0, "peak_mb": 0.0, "calls": 0}
+            )
+            timing["wall_seconds"] = round(timing["wall_seconds"] + wall, 6)
+            timing["cpu_seconds"] = round(timing["cpu_seconds"] + cpu, 6)
+            timing["peak_mb"] = round(max(timing["peak_mb"], (peak - baseline) / 2**20), 3)
+            timing["calls"] += 1
+
+    def report(self):
+        total = time.perf_counter() - self._started if self._started else None
+
+        report = {
+            "total_wall_seconds": round(total, 6) if total is not None else None,
+            "stages": self.stages
+        }
+
+        if self.profile_path:
+            report["cprofile"] = self.profile_path
+
+        return report
@@ -1,5 +1,29 @@
 import numpy as np
 
+
+def risk_scores(last_growth, growth_volatility, avg_forecast, avg_revenue):
+    # The rules of calculate_risk over arrays, one element per series.
+    # NaN inputs (too little history) never add points.
+    last_growth = np.asarray(last_growth, dtype="float64")
+    growth_volatility = np.asarray(growth_volatility, dtype="float64")
+    avg_forecast = np.asarray(avg_forecast, dtype="float64")
+    avg_revenue = np.asarray(avg_revenue, dtype="float64")
+
+    score = (
+        40 * (last_growth < 0) +
+        30 * (growth_volatility > 15) +
+        30 * (avg_forecast < avg_revenue)
+    )
+
+    level = np.select(
+        [score >= 60, score >= 30],
+        ["High Risk", "Medium Risk"],
+        default="Low Risk"
+    )
+
+    return score, level
+
+
 def calculate_risk(monthly_df, forecast):
     growth = monthly_df["growth_pct"].dropna()
     volatility = np.std(growth)
@@ -7,24 +31,14 @@ def calculate_risk(monthly_df, forecast):
     last_growth = growth.iloc[-1]
     avg_forecast = sum(f["predicted_revenue"] for f in forecast) / len(forecast)
 
-    score = 0
-
-    if last_growth < 0:
-        score += 40
-
-    if volatility > 15:
-        score += 30
-
-    if avg_forecast < monthly_df["revenue"].mean():
-        score += 30
-
-    level = (
-        "High Risk" if score >= 60 else
-        "Medium Risk" if score >= 30 else
-        "Low Risk"
+    score, level = risk_scores(
+        last_growth,
+        volatility,
+        avg_forecast,
+        monthly_df["revenue"].mean()
     )
 
     return {
-        "risk_score": score,
-        "risk_level": level
+        "risk_score": int(score),
+        "risk_level": str(level)
     }
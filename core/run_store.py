@@ -0,0 +1,273 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timezone
+
+RUN_STORE_PATH = "output/runs.sqlite"
+
+# Part of every run key: bump it whenever a change to the engine changes its
+# results, so runs stored by an older engine are never reused
+ENGINE_VERSION = 5
+
+# Queried fields get their own (indexed) columns; the full summary, the
+# forecast and the monthly trend are kept as JSON next to them
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dataset TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    run_key TEXT,
+    created_at TEXT NOT NULL,
+    business_health TEXT,
+    risk_level TEXT,
+    risk_score INTEGER,
+    avg_monthly_revenue REAL,
+    revenue_volatility REAL,
+    anomaly_count INTEGER,
+    summary TEXT NOT NULL,
+    forecast TEXT NOT NULL,
+    monthly TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_dataset ON runs (dataset, created_at);
+CREATE INDEX IF NOT EXISTS runs_created_at ON runs (created_at);
+CREATE INDEX IF NOT EXISTS runs_risk_level ON runs (risk_level, created_at);
+CREATE INDEX IF NOT EXISTS runs_input_hash ON runs (input_hash);
+"""
+
+# Stores created before runs had a key get the column; their runs have no key
+# and are never reused
+RUN_KEY_INDEX = "CREATE INDEX IF NOT EXISTS runs_run_key ON runs (run_key)"
+
+HISTORY_COLUMNS = (
+    "id",
+    "dataset",
+    "input_hash",
+    "created_at",
+    "business_health",
+    "risk_level",
+    "risk_score",
+    "avg_monthly_revenue",
+    "revenue_volatility",
+    "anomaly_count"
+)
+
+HISTORY_LIMIT = 90
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def file_fingerprint(path):
+    # Size and modification time instead of the content hash, for callers
+    # that must not read the whole file (incremental runs); kept apart from
+    # content hashes by its prefix
+    stat = os.stat(path)
+
+    return f"stat:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def run_key(input_hash, **options):
+    # Identifies a result: the input, the engine version and every option
+    # that changes the result
+    payload = json.dumps({"engine": ENGINE_VERSION, "input": input_hash, **options}, sort_keys=True)
+
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def dataset_name(path):
+    # Runs are filed under the absolute input path, so "data/sales.csv" and
+    # "./data/sales.csv" are the same dataset
+    return os.path.abspath(path)
+
+
+def _connect(store_path):
+    os.makedirs(os.path.dirname(store_path) or ".", exist_ok=True)
+
+    # Batch workers and the HTTP service write from several processes
+    conn = sqlite3.connect(store_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(runs)")}
+    if "run_key" not in columns:
+        conn.execute("ALTER TABLE runs ADD COLUMN run_key TEXT")
+    conn.execute(RUN_KEY_INDEX)
+
+    return conn
+
+
+def record_run(data_path, input_hash, key, summary, risk, forecast, monthly, store_path=RUN_STORE_PATH):
+    kpis = summary.get("kpis", {})
+
+    # Timings describe one particular run, not its result
+    summary = {name: value for name, value in summary.items() if name != "timings"}
+
+    with closing(_connect(store_path)) as conn, conn:
+        cursor = conn.execute(
+            """
+            INSERT INTO runs (
+                dataset, input_hash, run_key, created_at, business_health,
+                risk_level, risk_score, avg_monthly_revenue,
+                revenue_volatility, anomaly_count, summary, forecast, monthly
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                dataset_name(data_path),
+                input_hash,
+                key,
+                datetime.now(timezone.utc).isoformat(timespec="microseconds"),
+                summary.get("business_health"),
+                risk["risk_level"],
+                risk["risk_score"],
+                kpis.get("avg_monthly_revenue"),
+                kpis.get("revenue_volatility"),
+                len(summary.get("anomalies", [])),
+                json.dumps(summary),
+                json.dumps(forecast),
+                monthly.to_json(orient="records")
+            )
+        )
+
+    return cursor.lastrowid
+
+
+def _full_run(row):
+    run = {column: row[column] for column in HISTORY_COLUMNS}
+    run["summary"] = json.loads(row["summary"])
+    run["forecast"] = json.loads(row["forecast"])
+    run["monthly"] = json.loads(row["monthly"])
+
+    return run
+
+
+def find_run(key, store_path=RUN_STORE_PATH):
+    # Latest run with this run key (same input, engine version and options),
+    # whatever its file name
+    if not os.path.exists(store_path):
+        return None
+
+    with closing(_connect(store_path)) as conn:
+        row = conn.execute(
+            "SELECT * FROM runs WHERE run_key = ? ORDER BY id DESC LIMIT 1",
+            (key,)
+        ).fetchone()
+
+    return _full_run(row) if row else None
+
+
+def load_run(run_id, store_path=RUN_STORE_PATH):
+    with closing(_connect(store_path)) as conn:
+        row = conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+
+    return _full_run(row) if row else None
+
+
+def run_history(
+    dataset=None,
+    risk_level=None,
+    since=None,
+    limit=HISTORY_LIMIT,
+    store_path=RUN_STORE_PATH
+):
+    # Most recent runs first, optionally for one dataset / risk level /
+    # from an ISO timestamp on; every filter is served by an index
+    conditions, params = [], []
+
+    if dataset is not None:
+        conditions.append("dataset = ?")
+        params.append(dataset_name(dataset))
+
+    if risk_level is not None:
+        conditions.append("risk_level = ?")
+        params.append(risk_level)
+
+    if since is not None:
+        conditions.append("created_at >= ?")
+        params.append(since)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    with closing(_connect(store_path)) as conn:
+        rows = conn.execute(
+            f"SELECT {', '.join(HISTORY_COLUMNS)} FROM runs {where} "
+            "ORDER BY created_at DESC, id DESC LIMIT ?",
+            (*params, limit)
+        ).fetchall()
+
+    return [dict(row) for row in rows]
+
+
+def risk_trend(dataset, limit=HISTORY_LIMIT, store_path=RUN_STORE_PATH):
+    # The last `limit` runs of a dataset, oldest first, each with the risk
+    # level of the run before it, so changes can be read off directly
+    with closing(_connect(store_path)) as conn:
+        rows = conn.execute(
+            """
+            SELECT * FROM (
+                SELECT id, created_at, risk_level, risk_score,
+                       avg_monthly_revenue, business_health,
+                       LAG(risk_level) OVER (ORDER BY created_at, id) AS previous_risk_level
+                FROM runs
+                WHERE dataset = ?
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            )
+            ORDER BY created_at, id
+            """,
+            (dataset_name(dataset), limit)
+        ).fetchall()
+
+    return [
+        {**dict(row), "changed": row["previous_risk_level"] not in (None, row["risk_level"])}
+        for row in rows
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the Sales Decision Engine run history")
+    parser.add_argument("--store", default=RUN_STORE_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    history = commands.add_parser("history", help="list recent runs, newest first")
+    history.add_argument("--dataset")
+    history.add_argument("--risk-level")
+    history.add_argument("--since", help="ISO timestamp, e.g. 2024-06-01")
+    history.add_argument("--limit", type=int, default=HISTORY_LIMIT)
+
+    trend = commands.add_parser("trend", help="risk level of a dataset across its recent runs")
+    trend.add_argument("dataset")
+    trend.add_argument("--limit", type=int, default=HISTORY_LIMIT)
+
+    show = commands.add_parser("show", help="print one stored run as JSON")
+    show.add_argument("run_id", type=int)
+
+    args = parser.parse_args()
+
+    if args.command == "history":
+        for run in run_history(args.dataset, args.risk_level, args.since, args.limit, args.store):
+            print(
+                f"#{run['id']:<6} {run['created_at']}  {run['risk_level'] or '-':<12}"
+                f"{run['avg_monthly_revenue'] or 0:>16,.2f}  {run['dataset']}"
+            )
+
+    elif args.command == "trend":
+        for run in risk_trend(args.dataset, args.limit, args.store):
+            change = f"  ⚠️ was {run['previous_risk_level']}" if run["changed"] else ""
+            print(f"#{run['id']:<6} {run['created_at']}  {run['risk_level']:<12} {run['risk_score']:>4}{change}")
+
+    else:
+        run = load_run(args.run_id, args.store)
+        if run is None:
+            parser.error(f"No run with id {args.run_id}")
+
+        print(json.dumps(run, indent=4))
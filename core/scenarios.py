@@ -0,0 +1,126 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from core.dates import month_key
+from core.decision_engine import TREND_ACTIONS, business_trends
+from core.forecast import FORECAST_PATHS, FORECAST_SEED, forecast_volatility, predicted_revenue
+from core.risk_score import risk_scores
+
+
+def percent_range(start, stop, steps):
+    # e.g. percent_range(5, 20, 16) -> multipliers 1.05 ... 1.20
+    if start == stop:
+        return np.array([1 + start / 100])
+
+    return 1 + np.linspace(start, stop, steps) / 100
+
+
+def _monthly_split(df, categories=None, regions=None):
+    # Monthly revenue of the targeted rows and of everything else
+    target = pd.Series(True, index=df.index)
+
+    if categories is not None:
+        target &= df["category"].isin(categories)
+
+    if regions is not None:
+        target &= df["region"].isin(regions)
+
+    split = (
+        df["revenue"]
+        .groupby([month_key(df), target.rename("target")])
+        .sum()
+        .unstack(fill_value=0)
+        .reindex(columns=[False, True], fill_value=0)
+    )
+
+    return split[True].to_numpy(dtype="float64"), split[False].to_numpy(dtype="float64")
+
+
+def scenario_grid(
+    df,
+    price_multipliers,
+    quantity_multipliers,
+    categories=None,
+    regions=None,
+    months=3,
+    paths=FORECAST_PATHS,
+    seed=FORECAST_SEED
+):
+    # Every price x quantity multiplier pair is applied to the targeted
+    # category/region rows (all rows when no target is given) and the
+    # decision and risk rules are evaluated for all scenarios at once:
+    # revenue is a (scenarios x months) matrix built by broadcasting, not a
+    # rerun of the pipeline. Works on a cleaned frame or a cube.
+    target, other = _monthly_split(df, categories, regions)
+
+    if len(target) < 2:
+        raise ValueError("Scenarios need at least two months of data")
+
+    price, quantity = np.meshgrid(
+        np.asarray(price_multipliers, dtype="float64"),
+        np.asarray(quantity_multipliers, dtype="float64"),
+        indexing="ij"
+    )
+    price, quantity = price.ravel(), quantity.ravel()
+
+    revenue = other + (price * quantity)[:, None] * target
+
+    # business_decision: sign of the mean monthly change
+    trend = business_trends(np.diff(revenue, axis=1).mean(axis=1))
+
+    # calculate_risk: growth, its spread, and the simulated forecast
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = (revenue[:, 1:] / revenue[:, :-1] - 1) * 100
+
+    predicted = predicted_revenue(revenue[:, -1], forecast_volatility(revenue), months, paths, seed)
+    forecast = predicted.round(2).mean(axis=1)
+
+    score, level = risk_scores(
+        growth[:, -1],
+        growth.std(axis=1),
+        forecast,
+        revenue.mean(axis=1)
+    )
+
+    return pd.DataFrame({
+        "price_multiplier": price,
+        "quantity_multiplier": quantity,
+        "total_revenue": revenue.sum(axis=1).round(2),
+        "avg_monthly_revenue": revenue.mean(axis=1).round(2),
+        "last_growth_pct": growth[:, -1].round(2),
+        "forecast_revenue": forecast.round(2),
+        "business_health": trend,
+        "action": pd.Series(trend).map(TREND_ACTIONS).to_numpy(),
+        "risk_score": score,
+        "risk_level": level
+    })
+
+
+if __name__ == "__main__":
+    from core.preprocessing import load_and_clean_data
+
+    parser = argparse.ArgumentParser(description="Evaluate a grid of what-if price/quantity scenarios")
+    parser.add_argument("--input", default="data/sales.csv")
+    parser.add_argument("--category", nargs="+", help="only change these categories")
+    parser.add_argument("--region", nargs="+", help="only change these regions")
+    parser.add_argument("--price", type=float, nargs=2, default=[0, 0], metavar=("FROM", "TO"), help="price change range in %%")
+    parser.add_argument("--quantity", type=float, nargs=2, default=[0, 0], metavar=("FROM", "TO"), help="volume change range in %%")
+    parser.add_argument("--steps", type=int, default=21, help="grid points per range")
+    parser.add_argument("--output", help="write the scenario table to this CSV file")
+    args = parser.parse_args()
+
+    scenarios = scenario_grid(
+        load_and_clean_data(args.input),
+        percent_range(*args.price, args.steps),
+        percent_range(*args.quantity, args.steps),
+        categories=args.category,
+        regions=args.region
+    )
+
+    if args.output:
+        scenarios.to_csv(args.output, index=False)
+
+    print(scenarios["risk_level"].value_counts().to_string())
+    print(scenarios.sort_values("risk_score").head(10).to_string(index=False))
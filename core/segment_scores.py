@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+from core.dates import month_key
+from core.forecast import DEFAULT_VOLATILITY, FORECAST_PATHS, FORECAST_SEED, predicted_revenue
+from core.risk_score import risk_scores
+
+SCORECARD_DIMENSIONS = ("category", "region")
+
+
+def score_segments(
+    df,
+    dimensions=SCORECARD_DIMENSIONS,
+    months=3,
+    paths=FORECAST_PATHS,
+    seed=FORECAST_SEED
+):
+    # KPIs and risk for every segment (default category x region) from one
+    # grouped monthly series; the same rules as generate_kpis and
+    # calculate_risk, applied to whole columns. Works on a cleaned frame or a
+    # cube. Returns one row per segment, riskiest first.
+    dimensions = list(dimensions)
+
+    series = (
+        df
+        .groupby(dimensions + [month_key(df)], observed=True)["revenue"]
+        .sum()
+        .reset_index()
+    )
+
+    # Rows are ordered by (segment, month), so every per-segment quantity is
+    # a grouped reduction or a shift within the group
+    ids = series.groupby(dimensions, observed=True).ngroup()
+    revenue = series["revenue"]
+    by_segment = revenue.groupby(ids)
+
+    growth = (revenue / by_segment.shift(1) - 1) * 100
+    last = ~ids.duplicated(keep="last").to_numpy()
+
+    stats = by_segment.agg(["mean", "std", "size"])
+    growth_by_segment = growth.groupby(ids)
+
+    # Same month one year earlier, looked up for each segment's last month
+    by_month = pd.Series(revenue.to_numpy(), index=pd.MultiIndex.from_arrays([ids, series["month"]]))
+    year_ago = by_month.reindex(
+        pd.MultiIndex.from_arrays([ids[last], series["month"][last] - 12])
+    ).to_numpy()
+
+    volatility = (growth_by_segment.std() / 100).fillna(DEFAULT_VOLATILITY).to_numpy()
+    # Rounded per month first, exactly as calculate_risk sees the forecast
+    predicted = predicted_revenue(revenue[last].to_numpy(), volatility, months, paths, seed)
+    forecast = predicted.round(2).mean(axis=1)
+
+    last_growth = growth[last].to_numpy()
+    score, level = risk_scores(
+        last_growth,
+        growth_by_segment.std(ddof=0).to_numpy(),
+        forecast,
+        stats["mean"].to_numpy()
+    )
+
+    scorecard = series.loc[last, dimensions].reset_index(drop=True)
+    scorecard["months"] = stats["size"].to_numpy()
+    scorecard["avg_revenue"] = stats["mean"].round(2).to_numpy()
+    scorecard["best_month"] = series["month"].astype(str).to_numpy()[by_segment.idxmax().to_numpy()]
+    scorecard["worst_month"] = series["month"].astype(str).to_numpy()[by_segment.idxmin().to_numpy()]
+    scorecard["revenue_volatility"] = stats["std"].round(2).to_numpy()
+    scorecard["mom_growth_pct"] = np.round(last_growth, 2)
+    scorecard["yoy_growth_pct"] = np.round((revenue[last].to_numpy() / year_ago - 1) * 100, 2)
+    scorecard["forecast_revenue"] = forecast.round(2)
+    scorecard["risk_score"] = score
+    scorecard["risk_level"] = level
+
+    return (
+        scorecard
+        .sort_values(["risk_score", "mom_growth_pct"], ascending=[False, True], kind="stable")
+        .reset_index(drop=True)
+    )
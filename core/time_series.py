@@ -1,13 +1,93 @@
-def monthly_sales(df):
-    monthly = (
-        df
-        .groupby(df['date'].dt.to_period('M'))['revenue']
-        .sum()
-        .reset_index()
+from core.dates import month_key
+from core.preprocessing import reduce_chunks
+
+# Pyramid levels and their pandas period frequency, finest first
+GRANULARITIES = {
+    "daily": "D",
+    "weekly": "W",
+    "monthly": "M",
+    "quarterly": "Q",
+    "yearly": "Y"
+}
+
+# Each level is rolled up from the one named here rather than from the
+# daily totals, so every level after "weekly" sums only a handful of rows
+ROLLUP_SOURCE = {
+    "weekly": "daily",
+    "monthly": "daily",
+    "quarterly": "monthly",
+    "yearly": "quarterly"
+}
+
+PERIOD_NAMES = {
+    "daily": "day",
+    "weekly": "week",
+    "monthly": "month",
+    "quarterly": "quarter",
+    "yearly": "year"
+}
+
+MOVING_AVERAGE_WINDOWS = {
+    "daily": 7,
+    "weekly": 4,
+    "monthly": 3,
+    "quarterly": 4,
+    "yearly": 3
+}
+
+
+def _monthly_revenue(df):
+    return df.groupby(month_key(df).rename('date'))['revenue'].sum()
+
+
+def _daily_totals(df):
+    return df.groupby(df['date'].dt.to_period('D').rename('date')).agg(
+        revenue=('revenue', 'sum'),
+        rows=('revenue', 'size')
     )
 
-    monthly['date'] = monthly['date'].astype(str)
-    monthly['growth_pct'] = monthly['revenue'].pct_change() * 100
-    monthly['moving_avg'] = monthly['revenue'].rolling(3).mean()
 
-    return monthly
+def _trend_frame(revenue, granularity="monthly"):
+    # Growth and moving average work the same way at every level
+    trend = revenue.rename_axis('date').reset_index()
+
+    trend['date'] = trend['date'].astype(str)
+    trend['growth_pct'] = trend['revenue'].pct_change() * 100
+    trend['moving_avg'] = trend['revenue'].rolling(MOVING_AVERAGE_WINDOWS[granularity]).mean()
+
+    return trend
+
+
+def monthly_sales(df):
+    return _trend_frame(reduce_chunks(df, _monthly_revenue))
+
+
+def daily_totals(df):
+    # Revenue and row count per day. Needs row-level dates: a cube only has
+    # month starts in "date".
+    daily = reduce_chunks(df, _daily_totals)
+    daily['rows'] = daily['rows'].astype('int64')
+
+    return daily.reset_index()
+
+
+def pyramid_from_daily(daily):
+    # Every coarser level is a rollup of a finer one; returns
+    # {granularity: trend frame}, so switching level is a lookup
+    totals = {"daily": daily.set_index('date')['revenue']}
+
+    for granularity, source in ROLLUP_SOURCE.items():
+        finer = totals[source]
+        totals[granularity] = finer.groupby(
+            finer.index.asfreq(GRANULARITIES[granularity])
+        ).sum()
+
+    return {
+        granularity: _trend_frame(revenue, granularity)
+        for granularity, revenue in totals.items()
+    }
+
+
+def build_pyramid(df):
+    # One groupby over the raw rows produces the daily totals
+    return pyramid_from_daily(daily_totals(df))
@@ -0,0 +1,60 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+# Reports are built off the Streamlit script thread, so a large export never
+# blocks the session. The pool lives at module level to survive reruns.
+_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="excel-report")
+
+
+def _cell(value):
+    if value is None or (np.isscalar(value) and pd.isna(value)):
+        return None
+
+    if isinstance(value, np.generic):
+        return value.item()
+
+    if isinstance(value, (pd.Period, pd.Timestamp)):
+        return str(value)
+
+    return value
+
+
+def _write_sheet(workbook, title, df):
+    sheet = workbook.create_sheet(title)
+    sheet.append([str(column) for column in df.columns])
+
+    for row in df.itertuples(index=False, name=None):
+        sheet.append([_cell(value) for value in row])
+
+
+def report_sheets(monthly, anomalies, category_df, region_df, forecast):
+    return {
+        "Monthly Sales": monthly,
+        "Anomalies": pd.DataFrame(anomalies),
+        "By Category": category_df,
+        "By Region": region_df,
+        "Forecast": pd.DataFrame(forecast)
+    }
+
+
+def build_excel_report(sheets):
+    # Write-only mode streams each row out as it is appended instead of
+    # keeping the whole workbook in memory; the result goes to a buffer, not
+    # to a file on disk
+    workbook = Workbook(write_only=True)
+
+    for title, df in sheets.items():
+        _write_sheet(workbook, title, df)
+
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    return buffer.getvalue()
+
+
+def submit_excel_report(sheets):
+    return _EXECUTOR.submit(build_excel_report, sheets)
@@ -1,4 +1,8 @@
-def generate_summary(decision, top_category, risk, forecast):
+def _names(records, column):
+    return [record[column] for record in records]
+
+
+def generate_summary(decision, top_category, risk, forecast, rankings=None):
     business_health = decision.get("business_health", "Unknown")
     action = decision.get("action", "No action defined")
 
@@ -11,9 +15,31 @@ def generate_summary(decision, top_category, risk, forecast):
         f"with stable forecast expected over the next quarter."
     )
 
-    return {
+    summary = {
         "business_health": business_health,
         "top_category": top_category,
         "action": action,
         "executive_commentary": commentary
     }
+
+    # Drill-down rankings (see core.growth_driver.drill_down_rankings) add
+    # the best sellers of every category and the weakest regions
+    if rankings:
+        top_products = {
+            category: _names(products, "product")
+            for category, products in rankings["category"]["top_children"].items()
+        }
+        weakest_regions = _names(rankings["region"]["bottom"], "region")
+
+        best_sellers = top_products.get(top_category)
+        if best_sellers:
+            commentary += f" Best sellers in {top_category}: {', '.join(best_sellers)}."
+
+        if weakest_regions:
+            commentary += f" Weakest regions: {', '.join(weakest_regions)}."
+
+        summary["executive_commentary"] = commentary
+        summary["top_products"] = top_products
+        summary["weakest_regions"] = weakest_regions
+
+    return summary
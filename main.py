@@ -1,62 +1,325 @@
+import argparse
 import json
+import os
 
-from core.preprocessing import load_and_clean_data
+import pandas as pd
+
+from core.preprocessing import load_and_clean_data, memory_report
+from core.cube import build_cube
+from core.incremental import STATE_DIR, update_state
 from core.time_series import monthly_sales
-from core.growth_driver import category_performance
+from core.parallel_agg import partitioned_totals
+from core.growth_driver import drill_down_rankings
 from core.decision_engine import business_decision
 from insights.executive_summary import generate_summary
-from visualization.charts import sales_trend_chart
-from core.forecast import forecast_next_months
-from visualization.forecast_chart import forecast_chart
+from core.forecast import forecast_next_months, forecast_segments
 from core.risk_score import calculate_risk
+from core.segment_scores import score_segments
 from core.kpi import generate_kpis
-from core.anomaly_detection import detect_anomalies
-from visualization.anomaly_chart import anomaly_chart
+from core.anomaly_detection import detect_anomalies, detect_segment_anomalies
+from core.profiling import PROFILE_OUT_ENV, StageProfiler, profiling_requested
+from core.run_store import (
+    RUN_STORE_PATH,
+    file_digest,
+    file_fingerprint,
+    find_run,
+    record_run,
+    run_key
+)
+
+
+DATA_PATH = "data/sales.csv"
+OUTPUT_PATH = "output/insights.json"
+
+# Rows that fail validation are set aside here with a reason code
+QUARANTINE_PATH = "output/rejected_rows.csv"
+
+# Riskiest category x region segments listed in insights.json
+SEGMENT_RISK_SIZE = 5
+
+# Segments whose monthly series are scored for anomalies; incremental state
+# keeps months only down to category x region
+SEGMENT_ANOMALY_DIMENSIONS = ["category", "region"]
+
+# SALES_ENGINE_HEADLESS=1 skips charts (and never imports matplotlib)
+HEADLESS_ENV = "SALES_ENGINE_HEADLESS"
+
+
+def headless_requested():
+    return os.environ.get(HEADLESS_ENV, "").lower() in ("1", "true", "yes")
+
+
+def run_engine(
+    data_path=DATA_PATH,
+    output_path=OUTPUT_PATH,
+    chunksize=None,
+    incremental=False,
+    state_dir=STATE_DIR,
+    quarantine_path=QUARANTINE_PATH,
+    render_charts=None,
+    profile=False,
+    profile_path=None,
+    run_store=RUN_STORE_PATH,
+    reuse=True,
+    workers=None
+):
+    profiler = StageProfiler(
+        enabled=profile or profiling_requested(),
+        profile_path=profile_path or os.environ.get(PROFILE_OUT_ENV)
+    ).start()
+
+    if render_charts is None:
+        render_charts = not headless_requested()
+
+    # Every run is recorded in the run store (run_store=None disables it); an
+    # input analysed before by the same engine version along the same
+    # aggregation path returns the stored result instead of being recomputed.
+    # Profiled runs always recompute. Incremental runs exist to avoid reading
+    # the whole file, so they identify it by size and mtime instead of hashing
+    # its content.
+    input_hash, key = None, None
+
+    if run_store:
+        input_hash = file_fingerprint(data_path) if incremental else file_digest(data_path)
+
+        # Streamed cubes, incremental state and worker processes sum the same
+        # rows in a different order, so totals can differ in the last bits
+        key = run_key(
+            input_hash,
+            aggregation="incremental" if incremental else "streamed" if chunksize else "rows",
+            parallel=bool(workers and workers > 1)
+        )
+
+    if key and reuse and not profiler.enabled:
+        stored = find_run(key, run_store)
 
+        if stored is not None:
+            return _reuse_run(stored, data_path, input_hash, key, run_store, output_path, render_charts)
 
-def run_engine():
     # 1️⃣ Load & preprocess
-    df = load_and_clean_data("data/sales.csv")
+    with profiler.stage("load"):
+        if incremental:
+            # Incremental mode: only rows appended since the last run are read and
+            # upserted into the persisted month x category x region totals, which
+            # everything below works off; rankings use the product totals
+            _, data, products = update_state(data_path, state_dir, quarantine_path)
+        elif chunksize:
+            # Streaming mode: one pass folds the chunks into a compact
+            # month x category x region x product cube used by both aggregations
+            data = build_cube(load_and_clean_data(data_path, chunksize, quarantine_path))
+        else:
+            data = load_and_clean_data(data_path, quarantine_path=quarantine_path)
+
+    if quarantine_path and os.path.exists(quarantine_path):
+        print(f"⚠️ Rows that failed validation were written to {quarantine_path}")
+
+    if data.empty:
+        raise ValueError("No valid rows found in the input: every row failed validation")
 
     # 2️⃣ Analysis
-    monthly = monthly_sales(df)
-    category_df = category_performance(df)
+    with profiler.stage("analysis"):
+        leaf = products if incremental else data
+
+        if workers and workers > 1:
+            # Row blocks are summed in worker processes over shared memory,
+            # into the monthly totals and the category x region x product
+            # leaf the rankings roll up from (incremental runs already keep
+            # that leaf)
+            levels = ["monthly"] if incremental else ["monthly", "product"]
+            totals = partitioned_totals(data, levels, workers)
+
+            monthly = monthly_sales(totals["monthly"])
+            leaf = totals.get("product", leaf)
+        else:
+            monthly = monthly_sales(data)
+
+        # Top/bottom k at every hierarchy level in one grouped pass; the top
+        # category is the first entry, so nothing is fully sorted
+        rankings = drill_down_rankings(leaf)
 
     # 3️⃣ Decision
-    decision = business_decision(monthly)
+    with profiler.stage("decision"):
+        decision = business_decision(monthly)
 
     # 4️⃣ Forecast
-    forecast = forecast_next_months(monthly)
-    forecast_chart(forecast)
+    with profiler.stage("forecast"):
+        forecast = forecast_next_months(monthly)
+        segment_forecast = forecast_segments(data)
 
     # 5️⃣ Risk calculation
-    risk = calculate_risk(monthly, forecast)
+    with profiler.stage("risk"):
+        risk = calculate_risk(monthly, forecast)
+        segments = score_segments(data)
 
     # 6️⃣ Anomaly detection
-    anomalies = detect_anomalies(monthly)
-    
-    anomaly_chart(monthly, anomalies)
-
+    with profiler.stage("anomalies"):
+        anomalies = detect_anomalies(monthly)
+        segment_anomalies = detect_segment_anomalies(data, SEGMENT_ANOMALY_DIMENSIONS)
 
     # 7️⃣ Summary (NOW all inputs exist)
-    summary = generate_summary(
-        decision,
-        category_df.iloc[0]["category"],
-        risk,
-        forecast,
+    with profiler.stage("summary"):
+        summary = generate_summary(
+            decision,
+            rankings["category"]["top"][0]["category"],
+            risk,
+            forecast,
+            rankings
+        )
 
-    )
+        summary["kpis"] = generate_kpis(monthly)
+        summary["anomalies"] = anomalies
+
+        riskiest = segments.head(SEGMENT_RISK_SIZE).astype(object)
+        summary["segment_risk"] = riskiest.where(riskiest.notna(), None).to_dict("records")
+
+        summary["segment_forecast"] = segment_forecast.astype({"segment": str}).to_dict("records")
+
+        summary["segment_anomalies"] = (
+            segment_anomalies
+            .round({"revenue": 2, "z_score": 2})
+            .astype({"type": str})
+            .to_dict("records")
+        )
 
-    # 8️⃣ Add extra insights
-    summary["kpis"] = generate_kpis(monthly)
-    summary["anomalies"] = anomalies
+    # 8️⃣ Charts
+    if render_charts:
+        with profiler.stage("charts"):
+            _render_charts(monthly, forecast, anomalies)
 
     # 9️⃣ Save output
-    with open("output/insights.json", "w") as f:
-        json.dump(summary, f, indent=4)
+    with profiler.stage("save"):
+        _save_summary(summary, output_path)
+
+    if profiler.enabled:
+        profiler.stop()
+        summary["timings"] = profiler.report()
+        summary["timings"]["memory"] = memory_report(data)
+        _save_summary(summary, output_path)
+
+    # 🔟 Record run
+    if key:
+        record_run(data_path, input_hash, key, summary, risk, forecast, monthly, run_store)
 
-    print("✅ Sales Decision Engine executed successfully")
+    if output_path:
+        print("✅ Sales Decision Engine executed successfully")
+
+    return summary
+
+
+def _reuse_run(stored, data_path, input_hash, key, run_store, output_path, render_charts):
+    summary = stored["summary"]
+    monthly = pd.DataFrame(stored["monthly"])
+
+    if render_charts:
+        _render_charts(monthly, stored["forecast"], summary["anomalies"])
+
+    _save_summary(summary, output_path)
+
+    # A reused run is still a run of this dataset, so it goes in its history
+    risk = {"risk_level": stored["risk_level"], "risk_score": stored["risk_score"]}
+    record_run(data_path, input_hash, key, summary, risk, stored["forecast"], monthly, run_store)
+
+    if output_path:
+        print(f"♻️ Input unchanged since run #{stored['id']} ({stored['created_at']}); reused its result")
+
+    return summary
+
+
+def _render_charts(monthly, forecast, anomalies):
+    # Visualization modules are imported here rather than at module load, so
+    # JSON-only runs skip matplotlib entirely; charts only ever go to files,
+    # so the non-interactive Agg backend is forced
+    import matplotlib
+    matplotlib.use("Agg")
+
+    from visualization.forecast_chart import forecast_chart
+    from visualization.anomaly_chart import anomaly_chart
+
+    forecast_chart(forecast)
+    anomaly_chart(monthly, anomalies)
+
+
+def _save_summary(summary, output_path):
+    # output_path=None keeps the result in memory only (used by the service)
+    if not output_path:
+        return
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(summary, f, indent=4)
 
 
 if __name__ == "__main__":
-    run_engine()
+    parser = argparse.ArgumentParser(description="Run the Sales Decision Engine")
+    parser.add_argument(
+        "--input",
+        default=DATA_PATH,
+        help="sales file to analyse (.csv, .txt or .xlsx)"
+    )
+    parser.add_argument(
+        "--output",
+        default=OUTPUT_PATH,
+        help="where to write insights.json"
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="stream the input in chunks of this many rows"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only ingest rows appended since the last run (state in output/state)"
+    )
+    parser.add_argument(
+        "--quarantine",
+        default=QUARANTINE_PATH,
+        help="CSV file that receives rows failing validation, with a reason code"
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="only write insights.json; skip charts and never import matplotlib"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="record per-stage wall/CPU time and peak memory under \"timings\" in insights.json"
+    )
+    parser.add_argument(
+        "--profile-out",
+        default=None,
+        help="also write a cProfile dump of the run to this file"
+    )
+    parser.add_argument(
+        "--store",
+        default=RUN_STORE_PATH,
+        help="SQLite run history every run is recorded in (query it with python -m core.run_store)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="recompute even if the run store already holds a run of identical input"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="aggregate monthly and ranking totals across this many worker processes"
+    )
+    args = parser.parse_args()
+
+    run_engine(
+        data_path=args.input,
+        output_path=args.output,
+        chunksize=args.chunksize,
+        incremental=args.incremental,
+        quarantine_path=args.quarantine,
+        render_charts=False if args.headless else None,
+        profile=args.profile,
+        profile_path=args.profile_out,
+        run_store=args.store,
+        reuse=not args.no_cache,
+        workers=args.workers
+    )
@@ -0,0 +1,274 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlparse
+
+from core.cache import LRUCache
+from core.run_store import RUN_STORE_PATH, file_digest, run_key
+from main import run_engine
+
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+
+# Finished results are kept in memory and on disk, both addressed by the run
+# key of the dataset (its SHA-256, the engine version and the aggregation
+# options), so every worker and every restart shares them and an engine
+# upgrade never serves results of the previous version
+CACHE_DIR = "output/service_cache"
+CACHE_SIZE = 256
+
+MAX_UPLOAD_BYTES = 512 * 2**20
+
+UPLOAD_FORMATS = {"csv": ".csv", "txt": ".txt", "xlsx": ".xlsx", "xlsm": ".xlsm"}
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    422: "Unprocessable Entity",
+    500: "Internal Server Error"
+}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def analyze_path(path, chunksize=None, run_store=RUN_STORE_PATH):
+    return run_engine(
+        data_path=path,
+        output_path=None,
+        chunksize=chunksize,
+        quarantine_path=None,
+        render_charts=False,
+        run_store=run_store
+    )
+
+
+def analyze_upload(data, suffix, chunksize=None):
+    # The engine reads from a path, so the upload is spooled to a temp file
+    # inside the worker process; a temp file is not a dataset, so the run is
+    # not filed in the run history (the service cache already keeps it)
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+        f.write(data)
+
+    try:
+        return analyze_path(f.name, chunksize, run_store=None)
+    finally:
+        os.remove(f.name)
+
+
+class AnalysisService:
+    def __init__(self, workers=None, cache_size=CACHE_SIZE, cache_dir=CACHE_DIR, chunksize=None):
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.cache = LRUCache(cache_size)
+        self.cache_dir = cache_dir
+        self.chunksize = chunksize
+        self._inflight = {}
+
+    def _run_key(self, input_hash):
+        # The same key run_engine files its runs under
+        return run_key(
+            input_hash,
+            aggregation="streamed" if self.chunksize else "rows",
+            parallel=False
+        )
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_disk(self, key, result):
+        if not self.cache_dir:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._disk_path(key)
+
+        with open(path + ".tmp", "w") as f:
+            json.dump(result, f)
+        os.replace(path + ".tmp", path)
+
+    async def analyze(self, key, fn, *args):
+        result = self.cache.get(key)
+        if result is not None:
+            return result, True
+
+        result = self._read_disk(key)
+        if result is not None:
+            self.cache.put(key, result)
+            return result, True
+
+        # Concurrent requests for the same dataset share one computation
+        if key in self._inflight:
+            return await asyncio.shield(self._inflight[key]), True
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.pool, fn, *args, self.chunksize)
+        self._inflight[key] = future
+
+        try:
+            result = await future
+        finally:
+            del self._inflight[key]
+
+        self.cache.put(key, result)
+        await loop.run_in_executor(None, self._write_disk, key, result)
+
+        return result, False
+
+    async def analyze_request(self, query, headers, body):
+        loop = asyncio.get_running_loop()
+
+        if headers.get("content-type", "").startswith("application/json"):
+            try:
+                path = json.loads(body or b"{}")["path"]
+            except (ValueError, KeyError, TypeError):
+                raise RequestError(400, 'Expected a JSON body like {"path": "data/sales.csv"}')
+
+            if not os.path.isfile(path):
+                raise RequestError(404, f"No such file: {path}")
+
+            input_hash = await loop.run_in_executor(None, file_digest, path)
+            result, cached = await self.analyze(self._run_key(input_hash), analyze_path, path)
+        else:
+            upload_format = query.get("format", ["csv"])[0].lower()
+            if upload_format not in UPLOAD_FORMATS:
+                raise RequestError(400, f"Unsupported format: {upload_format}")
+
+            if not body:
+                raise RequestError(400, "Empty upload")
+
+            input_hash = hashlib.sha256(body).hexdigest()
+            result, cached = await self.analyze(
+                self._run_key(input_hash),
+                analyze_upload,
+                body,
+                UPLOAD_FORMATS[upload_format]
+            )
+
+        return {"input_hash": input_hash, "cached": cached, "result": result}
+
+    async def route(self, method, target, headers, body):
+        url = urlparse(target)
+
+        if url.path == "/health":
+            return {
+                "status": "ok",
+                "cache_entries": len(self.cache),
+                "in_flight": len(self._inflight)
+            }
+
+        if url.path == "/analyze":
+            if method != "POST":
+                raise RequestError(405, "Use POST /analyze")
+
+            return await self.analyze_request(parse_qs(url.query), headers, body)
+
+        raise RequestError(404, f"Unknown endpoint: {url.path}")
+
+    async def handle(self, reader, writer):
+        try:
+            status, payload = 200, await self._dispatch(reader)
+        except RequestError as error:
+            status, payload = error.status, {"error": str(error)}
+        except ValueError as error:
+            # Raised by the engine for unusable data (e.g. missing columns)
+            status, payload = 422, {"error": str(error)}
+        except Exception as error:
+            status, payload = 500, {"error": f"{type(error).__name__}: {error}"}
+
+        body = json.dumps(payload, indent=4, default=str).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode() + body
+        )
+
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _dispatch(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) != 3:
+            raise RequestError(400, "Malformed request line")
+
+        method, target, _ = request_line
+        headers = {}
+
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0) or 0)
+        if length > MAX_UPLOAD_BYTES:
+            raise RequestError(413, "Upload too large; send a path instead")
+
+        body = await reader.readexactly(length) if length else b""
+
+        return await self.route(method.upper(), target, headers, body)
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+async def serve(host=SERVICE_HOST, port=SERVICE_PORT, workers=None, chunksize=None):
+    service = AnalysisService(workers=workers, chunksize=chunksize)
+    server = await asyncio.start_server(service.handle, host, port)
+
+    print(f"✅ Sales Decision Engine service listening on http://{host}:{port}")
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the Sales Decision Engine over HTTP")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of analysis worker processes (default: one per CPU)"
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="stream each dataset in chunks of this many rows"
+    )
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.chunksize))
+    except KeyboardInterrupt:
+        pass
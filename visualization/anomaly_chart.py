@@ -1,33 +1,39 @@
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+import pandas as pd
 import os
 
-def anomaly_chart(monthly_df, anomalies):
-    os.makedirs("output/charts", exist_ok=True)
+from core.time_series import PERIOD_NAMES
+from visualization.downsample import downsample, point_marker, sparse_period_axis
+
+def anomaly_figure(monthly_df, anomalies, granularity="monthly"):
+    revenue = monthly_df["revenue"].to_numpy()
 
-    months = monthly_df["date"]
-    revenue = monthly_df["revenue"]
+    # Anomalies are located through a hash index on the period labels, and
+    # are always kept when a long series is downsampled
+    flagged = pd.Index(monthly_df["date"]).get_indexer([anomaly["month"] for anomaly in anomalies])
+    flagged = flagged[flagged >= 0]
+    points = downsample(revenue, keep=flagged)
 
-    plt.figure(figsize=(8, 4))
-    plt.plot(months, revenue, marker="o", label="Revenue")
+    fig = Figure(figsize=(8, 4))
+    ax = fig.add_subplot()
+    ax.plot(points, revenue[points], marker=point_marker(points), label="Revenue")
 
     # Highlight anomalies
-    for anomaly in anomalies:
-        idx = monthly_df[monthly_df["date"] == anomaly["month"]].index
-        if not idx.empty:
-            plt.scatter(
-                months.loc[idx],
-                revenue.loc[idx],
-                color="red",
-                s=100,
-                label="Anomaly"
-            )
-
-    plt.xlabel("Month")
-    plt.ylabel("Revenue")
-    plt.title("Monthly Sales with Anomaly Detection")
-    plt.xticks(rotation=45)
-    plt.legend()
-    plt.tight_layout()
-
-    plt.savefig("output/charts/anomalies.png")
-    plt.close()
+    if len(flagged):
+        ax.scatter(flagged, revenue[flagged], color="red", s=100, label="Anomaly", zorder=3)
+
+    sparse_period_axis(ax, monthly_df["date"])
+    ax.set_xlabel(PERIOD_NAMES[granularity].title())
+    ax.set_ylabel("Revenue")
+    ax.set_title(f"{granularity.title()} Sales with Anomaly Detection")
+    ax.tick_params(axis="x", labelrotation=45)
+    ax.legend()
+    fig.tight_layout()
+
+    return fig
+
+
+def anomaly_chart(monthly_df, anomalies, granularity="monthly"):
+    os.makedirs("output/charts", exist_ok=True)
+
+    anomaly_figure(monthly_df, anomalies, granularity).savefig("output/charts/anomalies.png")
@@ -1,14 +1,19 @@
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import os
 
+def category_pie_figure(df):
+    data = df.groupby("category", observed=True)["revenue"].sum()
+
+    fig = Figure(figsize=(5, 5))
+    ax = fig.add_subplot()
+    ax.pie(data, labels=data.index, autopct="%1.1f%%", startangle=140)
+    ax.set_title("Revenue Contribution by Category")
+    fig.tight_layout()
+
+    return fig
+
+
 def category_pie_chart(df):
     os.makedirs("output/charts", exist_ok=True)
 
-    data = df.groupby("category")["revenue"].sum()
-
-    plt.figure(figsize=(5, 5))
-    plt.pie(data, labels=data.index, autopct="%1.1f%%", startangle=140)
-    plt.title("Revenue Contribution by Category")
-    plt.tight_layout()
-    plt.savefig("output/charts/category_pie.png")
-    plt.close()
+    category_pie_figure(df).savefig("output/charts/category_pie.png")
@@ -1,20 +1,33 @@
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import os
 
-def sales_trend_chart(monthly_df):
-    os.makedirs("output/charts", exist_ok=True)
-    
+from core.time_series import PERIOD_NAMES
+from visualization.downsample import downsample, point_marker, sparse_period_axis
+
+def sales_trend_figure(monthly_df, granularity="monthly"):
+    # Long series (e.g. years of daily data) are drawn from an LTTB sample
+    # at integer x positions, with only a few period labels
+    revenue = monthly_df["revenue"].to_numpy()
+    points = downsample(revenue)
+
+    fig = Figure(figsize=(8, 4))
+    ax = fig.add_subplot()
+
+    ax.plot(points, revenue[points], marker=point_marker(points), label="Revenue")
+    ax.plot(points, monthly_df["moving_avg"].to_numpy()[points], linestyle="--", label="Moving Avg")
 
-    plt.figure(figsize=(8, 4))
-    plt.plot(monthly_df["date"], monthly_df["revenue"], marker="o", label="Revenue")
-    plt.plot(monthly_df["date"], monthly_df["moving_avg"], linestyle="--", label="Moving Avg")
+    sparse_period_axis(ax, monthly_df["date"])
+    ax.set_xlabel(PERIOD_NAMES[granularity].title())
+    ax.set_ylabel("Revenue")
+    ax.set_title(f"{granularity.title()} Sales Trend")
+    ax.legend()
+    ax.tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
 
-    plt.xlabel("Month")
-    plt.ylabel("Revenue")
-    plt.title("Monthly Sales Trend")
-    plt.legend()
-    plt.xticks(rotation=45)
-    plt.tight_layout()
+    return fig
+
+
+def sales_trend_chart(monthly_df, granularity="monthly"):
+    os.makedirs("output/charts", exist_ok=True)
 
-    plt.savefig("output/charts/sales_trend.png")
-    plt.close()
+    sales_trend_figure(monthly_df, granularity).savefig("output/charts/sales_trend.png")
@@ -0,0 +1,64 @@
+import numpy as np
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+
+# Most points a line chart draws; longer series are downsampled to this
+MAX_CHART_POINTS = 500
+
+MAX_TICK_LABELS = 10
+
+# Point markers are only drawn on short series; on long ones they hide the line
+MAX_MARKER_POINTS = 60
+
+
+def point_marker(points):
+    return "o" if len(points) <= MAX_MARKER_POINTS else None
+
+
+def lttb(values, threshold=MAX_CHART_POINTS):
+    # Largest-Triangle-Three-Buckets: keeps the first and last point and, from
+    # each of threshold - 2 equal buckets in between, the point forming the
+    # largest triangle with the previously kept point and the next bucket's
+    # average. Returns the positions of the kept points.
+    values = np.asarray(values, dtype="float64")
+    n = len(values)
+
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype="float64")
+    edges = (np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(int) + 1
+    bounds = np.append(edges, n)
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+
+    for bucket in range(threshold - 2):
+        start, end = bounds[bucket], bounds[bucket + 1]
+        next_x = x[end:bounds[bucket + 2]].mean()
+        next_y = values[end:bounds[bucket + 2]].mean()
+
+        area = np.abs(
+            (x[previous] - next_x) * (values[start:end] - values[previous]) -
+            (x[previous] - x[start:end]) * (next_y - values[previous])
+        )
+        previous = start + int(np.nanargmax(area))
+        selected[bucket + 1] = previous
+
+    return selected
+
+
+def downsample(values, threshold=MAX_CHART_POINTS, keep=()):
+    # LTTB positions plus any positions that must survive (anomalies), sorted
+    return np.union1d(lttb(values, threshold), np.asarray(keep, dtype=int))
+
+
+def sparse_period_axis(ax, labels):
+    # Points are plotted at integer positions; only a handful of evenly
+    # spaced positions get their period label, looked up when drawn
+    def label(position, _):
+        position = int(round(position))
+        return str(labels.iloc[position]) if 0 <= position < len(labels) else ""
+
+    ax.xaxis.set_major_locator(MaxNLocator(nbins=MAX_TICK_LABELS, integer=True))
+    ax.xaxis.set_major_formatter(FuncFormatter(label))
@@ -1,21 +1,20 @@
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import os
 
-def forecast_chart(forecast_data):
-    os.makedirs("output/charts", exist_ok=True)
-
+def forecast_figure(forecast_data):
     months = [f["month"] for f in forecast_data]
     values = [f["predicted_revenue"] for f in forecast_data]
     lower = [f["lower_bound"] for f in forecast_data]
     upper = [f["upper_bound"] for f in forecast_data]
 
-    plt.figure(figsize=(8, 4))
+    fig = Figure(figsize=(8, 4))
+    ax = fig.add_subplot()
 
     # Main forecast line
-    plt.plot(months, values, marker="o", linewidth=2, label="Forecast", color="#1f77b4")
+    ax.plot(months, values, marker="o", linewidth=2, label="Forecast", color="#1f77b4")
 
     # Confidence band
-    plt.fill_between(
+    ax.fill_between(
         months,
         lower,
         upper,
@@ -39,7 +38,7 @@ def forecast_chart(forecast_data):
             color = "red"
             text = f"{pct_change:.1f}%"
 
-        plt.annotate(
+        ax.annotate(
             f"{arrow} {text}",
             xy=(months[i], curr),
             xytext=(0, 12),
@@ -63,22 +62,28 @@ def forecast_chart(forecast_data):
         signal = "➖ Sideways Trend"
         signal_color = "gray"
 
-    plt.text(
+    ax.text(
         0.01, 0.95,
         signal,
-        transform=plt.gca().transAxes,
+        transform=ax.transAxes,
         fontsize=11,
         fontweight="bold",
         color=signal_color,
         verticalalignment="top"
     )
 
-    plt.title("3-Month Sales Forecast (Market-Style Projection)")
-    plt.xlabel("Month")
-    plt.ylabel("Revenue")
-    plt.legend()
-    plt.grid(alpha=0.3)
+    ax.set_title("3-Month Sales Forecast (Market-Style Projection)")
+    ax.set_xlabel("Month")
+    ax.set_ylabel("Revenue")
+    ax.legend()
+    ax.grid(alpha=0.3)
+
+    fig.tight_layout()
+
+    return fig
+
+
+def forecast_chart(forecast_data):
+    os.makedirs("output/charts", exist_ok=True)
 
-    plt.tight_layout()
-    plt.savefig("output/charts/forecast.png")
-    plt.close()
\ No newline at end of file
+    forecast_figure(forecast_data).savefig("output/charts/forecast.png")
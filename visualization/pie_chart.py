@@ -1,17 +1,13 @@
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import os
 
-def revenue_pie_chart(df, mode="category"):
-    os.makedirs("output/charts", exist_ok=True)
-
+def revenue_pie_figure(df, mode="category"):
     if mode == "category":
-        data = df.groupby("category")["revenue"].sum()
+        data = df.groupby("category", observed=True)["revenue"].sum()
         title = "Revenue Distribution by Category"
-        file_name = "revenue_pie_category.png"
     else:
-        data = df.groupby("region")["revenue"].sum()
+        data = df.groupby("region", observed=True)["revenue"].sum()
         title = "Revenue Distribution by Region"
-        file_name = "revenue_pie_region.png"
 
     def autopct_format(values):
         def my_format(pct):
@@ -20,8 +16,9 @@ def revenue_pie_chart(df, mode="category"):
             return f"{pct:.1f}%\n₹{value:,}"
         return my_format
 
-    plt.figure(figsize=(6, 6))
-    plt.pie(
+    fig = Figure(figsize=(6, 6))
+    ax = fig.add_subplot()
+    ax.pie(
         data,
         labels=data.index,
         autopct=autopct_format(data),
@@ -30,9 +27,16 @@ def revenue_pie_chart(df, mode="category"):
         textprops={"fontsize": 9}
     )
 
-    plt.title(title)
-    plt.tight_layout()
-    plt.savefig(f"output/charts/{file_name}")
-    plt.close()
+    ax.set_title(title)
+    fig.tight_layout()
+
+    return fig
+
+
+def revenue_pie_chart(df, mode="category"):
+    os.makedirs("output/charts", exist_ok=True)
+
+    file_name = "revenue_pie_category.png" if mode == "category" else "revenue_pie_region.png"
+    revenue_pie_figure(df, mode).savefig(f"output/charts/{file_name}")
 
     return file_name
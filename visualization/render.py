@@ -0,0 +1,113 @@
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import matplotlib
+matplotlib.use("Agg")
+
+from core.cache import get_cache, make_key
+from visualization.charts import sales_trend_figure
+from visualization.forecast_chart import forecast_figure
+from visualization.anomaly_chart import anomaly_figure
+from visualization.pie_chart import revenue_pie_figure
+from visualization.category_pie import category_pie_figure
+
+# Charts by name; each builder returns a Figure made with the object-oriented
+# API, so renders share no pyplot state and can run side by side
+CHARTS = {
+    "sales_trend": sales_trend_figure,
+    "forecast": forecast_figure,
+    "anomalies": anomaly_figure,
+    "revenue_pie": revenue_pie_figure,
+    "category_pie": category_pie_figure
+}
+
+CHART_FORMATS = ("png", "svg")
+
+RENDER_WORKERS = min(4, os.cpu_count() or 1)
+
+# Agg drawing holds the GIL, so charts render in worker processes. Workers
+# are forked from a fork server that has this module (and matplotlib)
+# preloaded rather than from the multi-threaded Streamlit process. As with
+# any spawned worker, a script that renders charts needs the usual
+# `if __name__ == "__main__":` guard. Created on first use.
+_EXECUTOR = None
+
+
+def _executor(restart=False):
+    global _EXECUTOR
+
+    if restart and _EXECUTOR is not None:
+        _EXECUTOR.shutdown(wait=False, cancel_futures=True)
+        _EXECUTOR = None
+
+    if _EXECUTOR is None:
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload([__name__])
+        else:
+            context = multiprocessing.get_context("spawn")
+
+        _EXECUTOR = ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=context)
+
+    return _EXECUTOR
+
+
+# Futures keyed on chart name, format and a content hash of the chart's
+# inputs: unchanged data returns the earlier bytes without drawing anything,
+# and a chart still being drawn is shared by every session asking for it
+_RENDERS = get_cache("visualization.render", maxsize=64)
+
+
+def figure_bytes(fig, fmt="png"):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt)
+
+    return buffer.getvalue()
+
+
+def _render(name, fmt, args, kwargs):
+    return figure_bytes(CHARTS[name](*args, **kwargs), fmt)
+
+
+def _forget_failed(key, future):
+    # A failed render is not kept, so the next request draws it again
+    if future.exception() is not None:
+        _RENDERS.put(key, None)
+
+
+def submit_chart(name, *args, fmt="png", **kwargs):
+    if name not in CHARTS:
+        raise ValueError(f"Unknown chart: {name}")
+
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"Unsupported chart format: {fmt}")
+
+    key = make_key(name, fmt, *args, **kwargs)
+
+    future = _RENDERS.get(key)
+    if future is None:
+        try:
+            future = _executor().submit(_render, name, fmt, args, kwargs)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool
+            future = _executor(restart=True).submit(_render, name, fmt, args, kwargs)
+
+        _RENDERS.put(key, future)
+        future.add_done_callback(lambda done: _forget_failed(key, done))
+
+    return future
+
+
+def render_chart(name, *args, fmt="png", **kwargs):
+    return submit_chart(name, *args, fmt=fmt, **kwargs).result()
+
+
+def render_charts(requests, fmt="png"):
+    # requests is a list of (name, args) pairs; all are submitted before
+    # waiting on any, and the bytes come back in the same order
+    futures = [submit_chart(name, *args, fmt=fmt) for name, args in requests]
+
+    return [future.result() for future in futures]